@@ -47,7 +47,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.profiling.SQLProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -94,10 +97,75 @@ DATABASES = {
         'USER': os.environ['DB_USER'],
         'PASSWORD': os.environ['DB_PASSWORD'],
         'HOST': os.environ['DB_HOST'],
-        'PORT': os.environ['DB_PORT']
+        'PORT': os.environ['DB_PORT'],
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': os.environ.get(
+            'DB_CONN_HEALTH_CHECKS', 'true'
+        ).lower() in ('1', 'true', 'yes'),
     }
 }
 
+# Connection pooling, requires ENGINE core.backends.postgresql.
+# Connections are borrowed per request and returned to the pool.
+
+if os.environ.get('DB_POOL', '').lower() in ('1', 'true', 'yes'):
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'stats_interval': float(
+                os.environ.get('DB_POOL_STATS_INTERVAL', 0)
+            ),
+        },
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Without CACHE_BACKEND the default cache lives in the memory of each
+# process. That suits data that is the same in every process, such as
+# compressed bodies keyed by their content.
+#
+# Cached recipe API responses are invalidated on write, which only
+# reaches other processes through a shared backend such as Redis or
+# Memcached. The response cache is therefore off (DummyCache) unless
+# CACHE_BACKEND names one.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', '')
+
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND or
+        'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': CACHE_LOCATION,
+    },
+    'recipe': {
+        'BACKEND': CACHE_BACKEND or
+        'django.core.cache.backends.dummy.DummyCache',
+        'LOCATION': CACHE_LOCATION,
+    },
+}
+
+RECIPE_CACHE_ALIAS = 'recipe'
+
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+
+# Response compression
+# Bodies below COMPRESSION_MIN_SIZE bytes are sent uncompressed.
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 512))
+
+COMPRESSION_CACHE_ALIAS = 'default'
+
+COMPRESSION_CACHE_TIMEOUT = int(
+    os.environ.get('COMPRESSION_CACHE_TIMEOUT', 300)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -142,6 +210,95 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Code version, used to invalidate the prebuilt OpenAPI schema.
+# Defaults to a digest of the source file contents, computed at startup.
+
+APP_VERSION = os.environ.get('APP_VERSION', '')
+
+# File written by `manage.py build_schema` and read on the first request.
+
+SCHEMA_FILE = os.environ.get('SCHEMA_FILE', '')
+
+# Request metrics served at /metrics
+# With METRICS_DIR set, every process writes its metrics there so they
+# are added up across workers. Clear the directory on start.
+
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+# Bearer token required to read /metrics. Without one /metrics answers
+# 403, unless METRICS_PUBLIC is set because the endpoint is only
+# reachable from a private network. It exposes route names and pool stats.
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+METRICS_PUBLIC = bool(int(os.environ.get('METRICS_PUBLIC', 0)))
+
+# SQL profiling
+# A SQL_PROFILING_SAMPLE_RATE share of requests records its statements.
+# Requests slower than SQL_PROFILING_LATENCY_BUDGET seconds, running more
+# than SQL_PROFILING_QUERY_BUDGET queries or one statement
+# SQL_PROFILING_REPEAT_LIMIT times are logged. SQL_PROFILING_STRICT
+# profiles every request and fails those over budget, for tests.
+
+SQL_PROFILING_SAMPLE_RATE = float(
+    os.environ.get('SQL_PROFILING_SAMPLE_RATE', 0)
+)
+
+SQL_PROFILING_LATENCY_BUDGET = float(
+    os.environ.get('SQL_PROFILING_LATENCY_BUDGET', 0.5)
+)
+
+SQL_PROFILING_QUERY_BUDGET = int(
+    os.environ.get('SQL_PROFILING_QUERY_BUDGET', 20)
+)
+
+SQL_PROFILING_REPEAT_LIMIT = int(
+    os.environ.get('SQL_PROFILING_REPEAT_LIMIT', 5)
+)
+
+SQL_PROFILING_STRICT = bool(int(os.environ.get('SQL_PROFILING_STRICT', 0)))
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Token authentication cache
+# Entries are kept per process for at most TOKEN_CACHE_TTL seconds.
+
+TOKEN_CACHE_MAX_SIZE = int(os.environ.get('TOKEN_CACHE_MAX_SIZE', 10000))
+
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 60))
+
+# Logging
+# https://docs.djangoproject.com/en/4.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.backends': {
+            'handlers': ['console'],
+            'level': os.environ.get('DB_POOL_LOG_LEVEL', 'INFO'),
+        },
+        'core.profiling': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
 }
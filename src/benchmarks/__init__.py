@@ -0,0 +1,75 @@
+"""
+Benchmarks for the recipe API.
+
+Each module can be run from the src directory against a throwaway test
+database, e.g.::
+
+    python -m benchmarks.tag_filter
+"""
+import contextlib
+import os
+import statistics
+import time
+
+import django
+
+
+def setup():
+    """Configure Django for a standalone benchmark run."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+DUMMY_CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+    for alias in ['default', 'recipe']
+}
+
+
+@contextlib.contextmanager
+def test_database(cache=False):
+    """Run the block against a freshly created test database.
+
+    Every cache is replaced by a dummy backend unless ``cache`` is set,
+    so repeated requests measure the uncached path. With ``cache`` the
+    response cache uses the local memory cache, which is consistent
+    within the single benchmark process.
+    """
+    from django.db import connection
+    from django.test.utils import (
+        override_settings,
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0,
+        autoclobber=True,
+    )
+    try:
+        if cache:
+            with override_settings(RECIPE_CACHE_ALIAS='default'):
+                yield
+        else:
+            with override_settings(CACHES=DUMMY_CACHES):
+                yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=20, warmup=3):
+    """Return the median wall time of func in milliseconds."""
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
@@ -0,0 +1,462 @@
+"""
+Benchmark the API endpoints and compare runs.
+
+    python -m benchmarks.api run [--driver client|http] [--output FILE]
+    python -m benchmarks.api compare BASELINE CANDIDATE [--threshold 0.1]
+
+``run`` fills a throwaway test database with a seeded dataset and measures
+recipe list, detail, create and update, tag list and token issuance. The
+``client`` driver sends requests one at a time through Django's test
+client. The ``http`` driver starts a local threaded server and sends
+requests from ``--concurrency`` threads. Results hold p50/p95/p99 latency
+and throughput per scenario and are written as JSON.
+
+``compare`` reads two result files and reports scenarios whose latency
+percentiles grew, or whose throughput dropped, by more than the
+threshold, or that had more errors. It exits with status 1 if there is
+any regression.
+"""
+import argparse
+import io
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks import setup, test_database
+
+PASSWORD = 'benchmark-password'
+
+LATENCY_METRICS = ['p50_ms', 'p95_ms', 'p99_ms']
+
+
+class Scenario:
+    """An endpoint request repeated during a benchmark.
+
+    ``request(i)`` returns the method, path and JSON body of the i-th
+    request. ``weight`` scales the number of requests, so slow scenarios
+    such as password checks run fewer of them.
+    """
+
+    def __init__(self, name, request, expected_status, weight=1.0):
+        self.name = name
+        self.request = request
+        self.expected_status = expected_status
+        self.weight = weight
+
+
+def populate(rng, recipe_count, tag_count=20):
+    """Create the benchmark user with seeded recipes and tags."""
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from core.models import Recipe, Tag
+
+    user = get_user_model().objects.create_user(
+        email='bench@example.com',
+        password=PASSWORD,
+    )
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(tag_count)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            description='Benchmark recipe. ' * rng.randint(0, 20),
+            time_minutes=rng.randint(5, 180),
+            price=f'{rng.uniform(1, 50):.2f}',
+            link=f'https://example.com/recipes/{i}',
+        )
+        for i in range(recipe_count)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes
+        for tag in rng.sample(tags, rng.randint(0, 5))
+    )
+    # Bulk inserts skip the signals maintaining the summaries.
+    call_command('recount_tags', stdout=io.StringIO())
+    call_command('rebuild_recipe_stats', stdout=io.StringIO())
+
+    return user, recipes
+
+
+def scenarios(recipes):
+    """Return the benchmarked scenarios."""
+    from django.urls import reverse
+
+    recipe_list = reverse('recipe:recipe-list')
+    tag_list = reverse('recipe:tag-list')
+    token = reverse('user:token')
+
+    def detail(i):
+        recipe = recipes[i % len(recipes)]
+        return reverse('recipe:recipe-detail', args=[recipe.id])
+
+    def updated(i):
+        recipe = recipes[-1 - i % len(recipes)]
+        return reverse('recipe:recipe-detail', args=[recipe.id])
+
+    return [
+        Scenario('recipe_list', lambda i: ('GET', recipe_list, None), 200),
+        Scenario('recipe_detail', lambda i: ('GET', detail(i), None), 200),
+        Scenario('recipe_create', lambda i: ('POST', recipe_list, {
+            'title': f'Benchmark {i}',
+            'time_minutes': 10 + i % 60,
+            'price': '5.00',
+            'tags': [{'name': f'Tag {i % 20}'}, {'name': 'Benchmark'}],
+        }), 201),
+        Scenario('recipe_update', lambda i: ('PATCH', updated(i), {
+            'title': f'Updated {i}',
+            'price': f'{1 + i % 40}.50',
+        }), 200),
+        Scenario('tag_list', lambda i: ('GET', tag_list, None), 200),
+        Scenario('token', lambda i: ('POST', token, {
+            'email': 'bench@example.com',
+            'password': PASSWORD,
+        }), 200, weight=0.1),
+    ]
+
+
+class ClientDriver:
+    """Send requests in process through Django's test client."""
+    name = 'client'
+
+    def __init__(self, token, concurrency):
+        from django.test import Client
+
+        self.client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def send(self, method, path, body):
+        """Send a request and return its status code."""
+        if body is None:
+            res = self.client.generic(method, path)
+        else:
+            res = self.client.generic(
+                method,
+                path,
+                json.dumps(body),
+                content_type='application/json',
+            )
+
+        return res.status_code
+
+
+class HTTPDriver:
+    """Send requests over HTTP to a local threaded server."""
+    name = 'http'
+
+    def __init__(self, token, concurrency):
+        self.concurrency = concurrency
+        self.headers = {
+            'Authorization': f'Token {token}',
+            'Content-Type': 'application/json',
+        }
+
+    def __enter__(self):
+        from django.db import connections
+        from django.test import modify_settings
+        from django.test.testcases import LiveServerThread, _StaticFilesHandler
+
+        self.allowed_hosts = modify_settings(
+            ALLOWED_HOSTS={'append': '127.0.0.1'},
+        )
+        self.allowed_hosts.enable()
+        # An in-memory SQLite test database only exists on this
+        # connection, share it with the server threads.
+        self.shared = {
+            conn.alias: conn for conn in connections.all()
+            if conn.vendor == 'sqlite' and conn.is_in_memory_db()
+        }
+        if self.shared and self.concurrency > 1:
+            raise SystemExit(
+                'An in-memory SQLite database can only serve one request '
+                'at a time, use PostgreSQL or --concurrency 1.'
+            )
+        for conn in self.shared.values():
+            conn.inc_thread_sharing()
+        self.server = LiveServerThread(
+            '127.0.0.1',
+            _StaticFilesHandler,
+            connections_override=self.shared,
+        )
+        self.server.daemon = True
+        self.server.start()
+        self.server.is_ready.wait()
+        if self.server.error:
+            raise self.server.error
+        self.base_url = f'http://127.0.0.1:{self.server.port}'
+
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.terminate()
+        for conn in self.shared.values():
+            conn.dec_thread_sharing()
+        self.allowed_hosts.disable()
+
+    def send(self, method, path, body):
+        """Send a request and return its status code."""
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers=self.headers,
+            method=method,
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as res:
+                res.read()
+                return res.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def percentile(timings, pct):
+    """Return the pct percentile of sorted timings, interpolated."""
+    if len(timings) == 1:
+        return timings[0]
+    position = (len(timings) - 1) * pct / 100
+    low = int(position)
+    high = min(low + 1, len(timings) - 1)
+
+    return timings[low] + (timings[high] - timings[low]) * (position - low)
+
+
+def summarize(timings, errors, elapsed):
+    """Return the result of one scenario."""
+    timings = sorted(timings)
+
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'throughput_rps': round(len(timings) / elapsed, 2),
+    }
+
+
+def run_scenario(driver, scenario, requests, concurrency, warmup):
+    """Send the requests of a scenario and return its result."""
+    for i in range(warmup):
+        driver.send(*scenario.request(i))
+
+    requests = max(1, int(requests * scenario.weight))
+    counter = iter(range(warmup, warmup + requests))
+    lock = threading.Lock()
+    timings = []
+    errors = 0
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            method, path, body = scenario.request(i)
+            start = time.perf_counter()
+            try:
+                ok = driver.send(method, path, body) == \
+                    scenario.expected_status
+            except OSError:
+                ok = False
+            duration = (time.perf_counter() - start) * 1000
+            with lock:
+                timings.append(duration)
+                errors += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+
+    return summarize(timings, errors, time.perf_counter() - start)
+
+
+def run(args):
+    """Run the benchmarks and write the results."""
+    setup()
+    import django
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+
+    drivers = {'client': ClientDriver, 'http': HTTPDriver}
+    if args.driver == 'client' and args.concurrency != 1:
+        sys.exit('The client driver only supports --concurrency 1.')
+
+    with test_database(cache=args.cache):
+        user, recipes = populate(random.Random(args.seed), args.recipes)
+        token = Token.objects.create(user=user).key
+        results = {}
+        with drivers[args.driver](token, args.concurrency) as driver:
+            for scenario in scenarios(recipes):
+                if args.scenario and scenario.name not in args.scenario:
+                    continue
+                results[scenario.name] = run_scenario(
+                    driver,
+                    scenario,
+                    args.requests,
+                    args.concurrency,
+                    args.warmup,
+                )
+                print_result(scenario.name, results[scenario.name])
+        vendor = connection.vendor
+
+    report = {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'driver': args.driver,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'recipes': args.recipes,
+            'seed': args.seed,
+            'cache': args.cache,
+            'database': vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'scenarios': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as stream:
+            json.dump(report, stream, indent=2)
+        print(f'Wrote {args.output}')
+
+
+def print_result(name, result):
+    """Print one scenario result as a table row."""
+    print(
+        f'{name:<14} {result["requests"]:>6} {result["errors"]:>6} '
+        f'{result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} '
+        f'{result["p99_ms"]:>9.2f} {result["throughput_rps"]:>9.1f}'
+    )
+
+
+def compare_results(baseline, candidate, threshold):
+    """Return the rows comparing two runs and whether any regressed.
+
+    Each row is (scenario, metric, baseline, candidate, change, regressed)
+    where change is relative to the baseline. More errors than in the
+    baseline is a regression whatever the threshold, so failing requests
+    cannot pass as fast ones.
+    """
+    rows = []
+    for name, old in baseline['scenarios'].items():
+        new = candidate['scenarios'].get(name)
+        if new is None:
+            continue
+        for metric in LATENCY_METRICS + ['throughput_rps', 'errors']:
+            if old[metric]:
+                change = new[metric] / old[metric] - 1
+            else:
+                change = math.inf if new[metric] else 0.0
+            if metric == 'errors':
+                regressed = new[metric] > old[metric]
+            elif metric == 'throughput_rps':
+                regressed = change < -threshold
+            else:
+                regressed = change > threshold
+            rows.append(
+                (name, metric, old[metric], new[metric], change, regressed)
+            )
+
+    return rows, any(row[-1] for row in rows)
+
+
+def compare(args):
+    """Compare two result files and exit with 1 on regressions."""
+    with open(args.baseline) as stream:
+        baseline = json.load(stream)
+    with open(args.candidate) as stream:
+        candidate = json.load(stream)
+
+    for key in ['driver', 'concurrency', 'database', 'recipes', 'cache']:
+        if baseline['meta'].get(key) != candidate['meta'].get(key):
+            print(
+                f'Warning: runs differ in {key}: '
+                f'{baseline["meta"].get(key)} != '
+                f'{candidate["meta"].get(key)}'
+            )
+
+    rows, regressed = compare_results(baseline, candidate, args.threshold)
+    print(f'{"scenario":<14} {"metric":<15} {"baseline":>10} '
+          f'{"candidate":>10} {"change":>8}')
+    for name, metric, old, new, change, flag in rows:
+        print(
+            f'{name:<14} {metric:<15} {old:>10.2f} {new:>10.2f} '
+            f'{change:>+8.1%}{"  REGRESSION" if flag else ""}'
+        )
+
+    if regressed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks.')
+    run_parser.add_argument(
+        '--driver', choices=['client', 'http'], default='client',
+    )
+    run_parser.add_argument('--concurrency', type=int, default=1)
+    run_parser.add_argument(
+        '--requests', type=int, default=200,
+        help='Requests per scenario, scaled by its weight.',
+    )
+    run_parser.add_argument('--warmup', type=int, default=10)
+    run_parser.add_argument('--recipes', type=int, default=1000)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument(
+        '--cache', action='store_true',
+        help='Keep the response cache enabled.',
+    )
+    run_parser.add_argument(
+        '--scenario', action='append',
+        help='Only run the named scenario, may be repeated.',
+    )
+    run_parser.add_argument('--output', help='File to write results to.')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser(
+        'compare', help='Compare two result files.',
+    )
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='Relative change counted as a regression, 0.1 by default.',
+    )
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    if args.command == 'run' and args.recipes < 1:
+        parser.error('--recipes must be at least 1.')
+    if args.command == 'run':
+        print(f'{"scenario":<14} {"reqs":>6} {"errors":>6} {"p50 ms":>9} '
+              f'{"p95 ms":>9} {"p99 ms":>9} {"req/s":>9}')
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
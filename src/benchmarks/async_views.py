@@ -0,0 +1,113 @@
+"""
+Benchmark the async read views against the sync viewsets under ASGI.
+
+    python -m benchmarks.async_views [--recipes N] [--concurrency N]
+
+Requests go through Django's ASGI handler in process. Sync views run on
+the thread sensitive executor, so concurrent requests queue for a single
+thread; async views only leave the event loop for database access.
+Reports throughput for the recipe list, recipe detail and tag list.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import setup, test_database
+
+REQUESTS = 200
+
+
+def populate(user, recipe_count):
+    """Create recipes with a few tags each."""
+    from core.models import Recipe, Tag
+
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(20)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=10,
+            price='5.00',
+        )
+        for i in range(recipe_count)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tags[j].id)
+        for i, recipe in enumerate(recipes)
+        for j in {i % 20, (i * 7) % 20}
+    )
+
+    return recipes
+
+
+async def throughput(client, url, headers, concurrency, requests=REQUESTS):
+    """Return requests per second for url at the given concurrency."""
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            res = await client.get(url, headers=headers)
+            assert res.status_code == 200, res.status_code
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from asgiref.sync import sync_to_async
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from django.test import AsyncClient
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+        )
+        token = Token.objects.create(user=user)
+        recipe = populate(user, args.recipes)[0]
+        headers = {'Authorization': f'Token {token.key}'}
+        endpoints = [
+            ('recipe list', 'recipe-list', []),
+            ('recipe detail', 'recipe-detail', [recipe.id]),
+            ('tag list', 'tag-list', []),
+        ]
+
+        async def run():
+            client = AsyncClient()
+            print(f'{"endpoint":<14} {"sync (req/s)":>13} '
+                  f'{"async (req/s)":>14}')
+            for label, name, url_args in endpoints:
+                sync_url = reverse(f'recipe:{name}', args=url_args)
+                async_url = reverse(f'recipe:async-{name}', args=url_args)
+                for url in (sync_url, async_url):
+                    await throughput(client, url, headers, 1, requests=10)
+
+                sync_rate = await throughput(
+                    client, sync_url, headers, args.concurrency,
+                )
+                async_rate = await throughput(
+                    client, async_url, headers, args.concurrency,
+                )
+                print(f'{label:<14} {sync_rate:>13.1f} {async_rate:>14.1f}')
+
+            # Database access ran on the executor thread, close its
+            # connection so the test database can be dropped.
+            await sync_to_async(connections.close_all)()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark the orjson backed renderer and parser against DRF's defaults.
+
+    python -m benchmarks.json_rendering
+
+Renders and parses recipe list payloads shaped like the list endpoint
+output. No database is needed.
+"""
+import io
+
+from benchmarks import measure, setup
+
+RECIPE_COUNTS = [100, 1000, 10000]
+
+
+def recipe_list(count):
+    """Return a recipe list payload with count recipes."""
+    return [
+        {
+            'id': i,
+            'title': f'Recipe {i} – crème brûlée',
+            'time_minutes': i % 90,
+            'price': f'{i % 100}.50',
+            'link': f'https://example.com/recipes/{i}',
+            'tags': [
+                {'id': j, 'name': f'Tag {j}'} for j in range(i % 5)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from core import renderers
+    from core.parsers import FastJSONParser
+    from core.renderers import FastJSONRenderer
+
+    if renderers.orjson is None:
+        print('orjson is not installed, both paths use the stdlib.')
+
+    print(f'{"recipes":>8} {"render (ms)":>12} {"fast (ms)":>10} '
+          f'{"parse (ms)":>11} {"fast (ms)":>10}')
+    for count in RECIPE_COUNTS:
+        data = recipe_list(count)
+        content = JSONRenderer().render(data)
+        assert FastJSONRenderer().render(data) == content
+
+        def parse(parser):
+            return lambda: parser.parse(io.BytesIO(content))
+
+        print(
+            f'{count:>8} '
+            f'{measure(lambda: JSONRenderer().render(data)):>12.2f} '
+            f'{measure(lambda: FastJSONRenderer().render(data)):>10.2f} '
+            f'{measure(parse(JSONParser())):>11.2f} '
+            f'{measure(parse(FastJSONParser())):>10.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark RecipeSerializer against the values() based list payloads.
+
+    python -m benchmarks.serialization [--tags N]
+
+Both paths load the recipes and their tags and build the list data, so
+the timings include the queries as well as the serialization.
+"""
+import argparse
+
+from benchmarks import measure, setup, test_database
+
+RECIPE_COUNTS = [100, 1000, 5000]
+
+
+def populate(user, recipe_count, tags_per_recipe):
+    """Create recipes linked to a few shared tags."""
+    from core.models import Recipe, Tag
+
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(tags_per_recipe * 2)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=i % 90,
+            price='12.50',
+            link=f'https://example.com/recipes/{i}',
+        )
+        for i in range(recipe_count)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for i, recipe in enumerate(recipes)
+        for tag in tags[i % 2::2][:tags_per_recipe]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tags', type=int, default=3)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db.models import Prefetch
+    from core.models import Recipe, Tag
+    from recipe import payloads
+    from recipe.serializers import RecipeSerializer
+
+    with test_database():
+        print(f'{"recipes":>8} {"serializer (ms)":>16} {"payload (ms)":>13} '
+              f'{"speedup":>8}')
+        for recipe_count in RECIPE_COUNTS:
+            user = get_user_model().objects.create_user(
+                email=f'bench-{recipe_count}@example.com',
+            )
+            populate(user, recipe_count, args.tags)
+            recipes = Recipe.objects.filter(user=user).order_by('-id')
+
+            def serializer():
+                return RecipeSerializer(
+                    recipes.prefetch_related(
+                        Prefetch('tags', queryset=Tag.objects.order_by('id'))
+                    ),
+                    many=True,
+                ).data
+
+            def payload():
+                return payloads.recipe_list(
+                    recipes.values(*payloads.columns())
+                )
+
+            slow = measure(serializer, repeat=10)
+            fast = measure(payload, repeat=10)
+            print(f'{recipe_count:>8} {slow:>16.2f} {fast:>13.2f} '
+                  f'{slow / fast:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
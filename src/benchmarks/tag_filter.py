@@ -0,0 +1,88 @@
+"""
+Benchmark filtering recipes by tags as the number of tags grows.
+
+    python -m benchmarks.tag_filter [--recipes N]
+
+Every user holds the same number of recipes with three tags each, drawn
+from a growing pool of tags. Latency of ``?tags=`` should stay flat as
+the pool grows, for both any-of and all-of matching.
+"""
+import argparse
+import random
+
+from benchmarks import measure, setup, test_database
+
+TAG_COUNTS = [10, 100, 1000, 10000]
+
+
+def analyze():
+    """Refresh planner statistics after loading data."""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def populate(user, recipe_count, tag_count, rng):
+    """Create recipes linked to random tags out of tag_count."""
+    from core.models import Recipe, Tag
+
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(tag_count)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=10,
+            price='5.00',
+        )
+        for i in range(recipe_count)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes
+        for tag in rng.sample(tags, 3)
+    )
+    analyze()
+
+    return tags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+
+    rng = random.Random(args.seed)
+    with test_database():
+        print(f'{"tags":>8} {"any (ms)":>10} {"all (ms)":>10}')
+        for tag_count in TAG_COUNTS:
+            user = get_user_model().objects.create_user(
+                email=f'bench-{tag_count}@example.com',
+            )
+            tags = populate(user, args.recipes, tag_count, rng)
+            ids = ','.join(str(tag.id) for tag in tags[:3])
+            client = APIClient()
+            client.force_authenticate(user=user)
+
+            def query(match):
+                return lambda: client.get(
+                    '/api/recipe/recipes/',
+                    {'tags': ids, 'tags_match': match, 'page_size': 50},
+                )
+
+            print(
+                f'{tag_count:>8} '
+                f'{measure(query("any")):>10.2f} '
+                f'{measure(query("all")):>10.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
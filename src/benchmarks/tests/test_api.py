@@ -0,0 +1,92 @@
+"""
+Tests for the API benchmark helpers.
+"""
+from django.test import SimpleTestCase
+
+from benchmarks import api
+
+
+def result(p50=10.0, throughput=100.0, errors=0):
+    """Return a scenario result."""
+    return {
+        'requests': 100,
+        'errors': errors,
+        'p50_ms': p50,
+        'p95_ms': p50 * 2,
+        'p99_ms': p50 * 3,
+        'mean_ms': p50,
+        'throughput_rps': throughput,
+    }
+
+
+def run(**scenarios):
+    """Return the results of a run."""
+    return {'meta': {}, 'scenarios': scenarios}
+
+
+class PercentileTests(SimpleTestCase):
+    """Test computing percentiles."""
+
+    def test_interpolated(self):
+        """Test percentiles interpolate between timings."""
+        timings = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+        self.assertEqual(api.percentile(timings, 0), 1.0)
+        self.assertEqual(api.percentile(timings, 50), 3.0)
+        self.assertEqual(api.percentile(timings, 100), 5.0)
+        self.assertAlmostEqual(api.percentile(timings, 95), 4.8)
+
+    def test_single_timing(self):
+        """Test a single timing is every percentile."""
+        self.assertEqual(api.percentile([7.0], 99), 7.0)
+
+
+class CompareResultsTests(SimpleTestCase):
+    """Test comparing two runs."""
+
+    def regressed(self, baseline, candidate):
+        """Return the regressed metrics of the candidate."""
+        rows, regressed = api.compare_results(baseline, candidate, 0.1)
+        metrics = [row[1] for row in rows if row[-1]]
+        self.assertEqual(regressed, bool(metrics))
+
+        return metrics
+
+    def test_within_threshold(self):
+        """Test changes within the threshold are not regressions."""
+        self.assertEqual(self.regressed(
+            run(list=result()),
+            run(list=result(p50=10.5, throughput=95.0)),
+        ), [])
+
+    def test_slower(self):
+        """Test higher latency is a regression."""
+        self.assertEqual(self.regressed(
+            run(list=result()),
+            run(list=result(p50=12.0)),
+        ), ['p50_ms', 'p95_ms', 'p99_ms'])
+
+    def test_lower_throughput(self):
+        """Test lower throughput is a regression."""
+        self.assertEqual(self.regressed(
+            run(list=result()),
+            run(list=result(throughput=80.0)),
+        ), ['throughput_rps'])
+
+    def test_more_errors(self):
+        """Test failing requests are a regression even when faster."""
+        self.assertEqual(self.regressed(
+            run(list=result()),
+            run(list=result(p50=1.0, throughput=500.0, errors=100)),
+        ), ['errors'])
+
+    def test_missing_scenario_skipped(self):
+        """Test scenarios missing from the candidate are skipped."""
+        rows, regressed = api.compare_results(
+            run(list=result(), token=result()),
+            run(list=result()),
+            0.1,
+        )
+
+        self.assertEqual({row[0] for row in rows}, {'list'})
+        self.assertFalse(regressed)
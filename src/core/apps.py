@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import authentication, metrics, profiling, signals  # noqa
+        from core import schema
+
+        if not settings.APP_VERSION:
+            schema.load_source_version()
@@ -0,0 +1,189 @@
+"""
+Authentication classes.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """Bounded LRU cache of token keys to users, with a time to live.
+
+    Entries live in the memory of one process, so invalidation through
+    signals only reaches the process doing the write. The TTL bounds how
+    long other processes can keep serving a stale entry.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached (user, token) pair or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            user, token = entry[1], entry[2]
+
+        return copy.copy(user), token
+
+    def set(self, key, user, token):
+        """Cache the pair, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop the entry for a token key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        """Drop every entry belonging to a user."""
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if entry[1].pk == user_id
+            ]
+            for key in keys:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the hit and miss counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+)
+
+
+def get_token_key(request, keyword):
+    """Return the token key of the Authorization header, or None.
+
+    None means the header does not use the keyword, so other
+    authentication classes may still accept the request. Malformed
+    headers fail with the messages of DRF's TokenAuthentication.
+    """
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != keyword.lower().encode():
+        return None
+
+    if len(auth) == 1:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. No credentials provided.')
+        )
+    if len(auth) > 2:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. Token string should not contain '
+              'spaces.')
+        )
+    try:
+        return auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. Token string should not contain '
+              'invalid characters.')
+        )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches token lookups in memory."""
+
+    def authenticate_credentials(self, key):
+        """Return the user for a token, hitting the database on a miss."""
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+
+        return copy.copy(user), token
+
+    async def aauthenticate(self, request):
+        """Authenticate a request from a native async view."""
+        key = get_token_key(request, self.keyword)
+        if key is None:
+            return None
+
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """Return the user for a token using the async ORM on a miss."""
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        token_cache.set(key, token.user, token)
+
+        return copy.copy(token.user), token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Forget a token as soon as it is deleted."""
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_changed_user(sender, instance, **kwargs):
+    """Forget a user's tokens when the user is changed or deleted.
+
+    This covers deactivation as well as profile updates, so cached users
+    never show stale data.
+    """
+    token_cache.invalidate_user(instance.pk)
@@ -0,0 +1,146 @@
+"""
+PostgreSQL database backend with psycopg_pool connection pooling.
+
+Enable pooling by adding a ``pool`` dict to the database ``OPTIONS``; its
+items are passed on to ``psycopg_pool.ConnectionPool`` (``min_size``,
+``max_size``, ``timeout``, ...). ``CONN_HEALTH_CHECKS`` makes the pool
+check each connection before handing it out. Without ``pool`` the backend
+behaves exactly like Django's own.
+"""
+import logging
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+
+from core.backends.postgresql.creation import DatabaseCreation
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL connection that borrows from a shared pool."""
+    _connection_pools = {}
+    _pools_lock = threading.Lock()
+    _stats_logged_at = 0.0
+    creation_class = DatabaseCreation
+
+    @property
+    def pool_options(self):
+        """Return the pool settings, or None if pooling is disabled."""
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options:
+            return None
+
+        return {} if options is True else dict(options)
+
+    @property
+    def pool_key(self):
+        """Identify the pool so test databases get their own."""
+        return (self.alias, self.settings_dict['NAME'])
+
+    @property
+    def pool(self):
+        """Return the connection pool of this database, creating it once."""
+        pool_options = self.pool_options
+        if pool_options is None or self.alias == NO_DB_ALIAS:
+            return None
+
+        if self.pool_key not in self._connection_pools:
+            if self.settings_dict['CONN_MAX_AGE'] != 0:
+                raise ImproperlyConfigured(
+                    'Pooling does not support persistent connections, '
+                    'set CONN_MAX_AGE to 0.'
+                )
+
+            from psycopg_pool import ConnectionPool
+
+            pool_options.pop('stats_interval', None)
+            check = None
+            if self.settings_dict['CONN_HEALTH_CHECKS']:
+                check = ConnectionPool.check_connection
+            pool = ConnectionPool(
+                kwargs={**self.get_connection_params(), 'autocommit': True},
+                open=False,
+                check=check,
+                name=self.alias,
+                **pool_options,
+            )
+            with self._pools_lock:
+                if self.pool_key not in self._connection_pools:
+                    pool.open()
+                    self._connection_pools[self.pool_key] = pool
+
+        return self._connection_pools[self.pool_key]
+
+    def close_pool(self):
+        """Close the pool of this database and its idle connections."""
+        with self._pools_lock:
+            pool = self._connection_pools.pop(self.pool_key, None)
+        if pool is not None:
+            self.close()
+            pool.close()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        """Borrow a connection from the pool if pooling is enabled."""
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = base.IsolationLevel(
+                isolation_level
+                if isolation_level is not None
+                else base.IsolationLevel.READ_COMMITTED
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f'Invalid transaction isolation level {isolation_level} '
+                f'specified. Use one of the psycopg.IsolationLevel values.'
+            )
+
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        self._log_pool_stats(pool)
+
+        return connection
+
+    def _close(self):
+        """Hand the connection back to the pool instead of closing it."""
+        if self.connection is None or self.pool is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            self.pool.putconn(self.connection)
+        self.connection = None
+
+    def _log_pool_stats(self, pool):
+        """Log pool usage at most once per stats interval."""
+        interval = self.pool_options.get('stats_interval', 0)
+        now = time.monotonic()
+        if not interval or now - DatabaseWrapper._stats_logged_at < interval:
+            return
+
+        DatabaseWrapper._stats_logged_at = now
+        logger.info('Connection pool %s stats: %s', pool.name,
+                    pool.get_stats())
+
+
+def pool_stats():
+    """Return usage statistics of every open pool by database alias.
+
+    Only pools that already exist are read, so no pool is opened here.
+    """
+    with DatabaseWrapper._pools_lock:
+        pools = dict(DatabaseWrapper._connection_pools)
+
+    return {alias: pool.get_stats() for (alias, _name), pool in pools.items()}
@@ -0,0 +1,11 @@
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as BaseDatabaseCreation
+)
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+    """Close pooled connections before the test database is dropped."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,32 @@
+"""
+Django command to prebuild the OpenAPI schema.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import code_version, generate_schema, write_schema
+
+
+class Command(BaseCommand):
+    """Django command to write the OpenAPI schema for the code version."""
+    help = 'Generate the OpenAPI schema and write it to SCHEMA_FILE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            help='File to write, SCHEMA_FILE by default.',
+        )
+
+    def handle(self, *args, **options):
+        """Generate and write the schema."""
+        path = options['path'] or settings.SCHEMA_FILE
+        if not path:
+            raise CommandError('Pass a path or set SCHEMA_FILE.')
+
+        version = code_version()
+        write_schema(path, version, generate_schema())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote schema for version {version} to {path}.'
+        ))
@@ -0,0 +1,250 @@
+"""
+Django command to bulk import recipes for a user with PostgreSQL COPY.
+"""
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import TIME_BUCKETS, Recipe, RecipeStats, Tag
+from recipe.cache import bump_version
+from recipe.exports import TAG_SEPARATOR
+
+STAGING_TABLE = 'import_recipe_staging'
+FORMATS = ['ndjson', 'csv']
+
+
+def check_length(model, field, value):
+    """Raise ValueError if value is longer than the model field allows."""
+    max_length = model._meta.get_field(field).max_length
+    if len(value) > max_length:
+        raise ValueError(
+            f'{field} is longer than {max_length} characters'
+        )
+
+    return value
+
+
+def parse_price(value):
+    """Return the price, or raise ValueError if the column cannot hold it."""
+    field = Recipe._meta.get_field('price')
+    price = Decimal(str(value)).quantize(Decimal(1).scaleb(
+        -field.decimal_places,
+    ))
+    if abs(price) >= 10 ** (field.max_digits - field.decimal_places):
+        raise ValueError(f'price {value} is out of range')
+
+    return price
+
+
+def parse_record(record, line_no):
+    """Convert an exported recipe record into a staging row.
+
+    Values are checked against the columns here, so a bad record fails
+    with its line number instead of aborting the COPY.
+    """
+    try:
+        tags = record.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(TAG_SEPARATOR)
+        time_minutes = int(record['time_minutes'])
+        if time_minutes < 0:
+            raise ValueError('time_minutes must not be negative')
+        return (
+            line_no,
+            check_length(Recipe, 'title', record['title']),
+            record.get('description') or '',
+            time_minutes,
+            parse_price(record['price']),
+            check_length(Recipe, 'link', record.get('link') or ''),
+            [
+                check_length(Tag, 'name', tag)
+                for tag in dict.fromkeys(tags) if tag
+            ],
+        )
+    except (KeyError, TypeError, ValueError, InvalidOperation) as e:
+        raise CommandError(f'Invalid recipe on line {line_no}: {e!r}')
+
+
+def read_ndjson(stream):
+    """Yield staging rows from an NDJSON stream."""
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise CommandError(f'Invalid JSON on line {line_no}: {e}')
+        yield parse_record(record, line_no)
+
+
+def read_csv(stream):
+    """Yield staging rows from a CSV stream with a header line."""
+    for line_no, record in enumerate(csv.DictReader(stream), start=2):
+        yield parse_record(record, line_no)
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+class Command(BaseCommand):
+    """Django command to import recipes from NDJSON or CSV."""
+    help = 'Bulk import recipes and tags for a user using COPY.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or CSV file to import.')
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email of the user owning the recipes.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format, guessed from the extension by default.',
+        )
+
+    def handle(self, *args, **options):
+        """Load the file into staging tables and merge it."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('import_recipes requires PostgreSQL.')
+
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        path = options['path']
+        file_format = options['format'] or \
+            os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(
+                f'Unknown format {file_format!r}, use --format.'
+            )
+
+        with open(path, newline='', encoding='utf-8') as stream, \
+                transaction.atomic(), \
+                connection.cursor() as cursor:
+            self._create_staging_table(cursor)
+            self._copy_rows(cursor, READERS[file_format](stream))
+            counts = self._merge(cursor, user.id)
+            bump_version(user.id)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Imported {recipes} recipes, {tags} new tags and '
+            '{links} tag links.'.format(**counts)
+        ))
+
+    def _create_staging_table(self, cursor):
+        """Create a temporary table dropped at the end of the transaction."""
+        cursor.execute(f"""
+            CREATE TEMPORARY TABLE {STAGING_TABLE} (
+                line_no bigint PRIMARY KEY,
+                recipe_id bigint,
+                title varchar(255) NOT NULL,
+                description text NOT NULL,
+                time_minutes integer NOT NULL,
+                price numeric(5, 2) NOT NULL,
+                link varchar(255) NOT NULL,
+                tags text[] NOT NULL
+            ) ON COMMIT DROP
+        """)
+
+    def _copy_rows(self, cursor, rows):
+        """Stream rows into the staging table with COPY."""
+        with cursor.copy(f"""
+            COPY {STAGING_TABLE} (
+                line_no, title, description, time_minutes, price, link, tags
+            ) FROM STDIN
+        """) as copy:
+            copy.set_types([
+                'int8', 'text', 'text', 'int4', 'numeric', 'text', 'text[]',
+            ])
+            for row in rows:
+                copy.write_row(row)
+
+    def _merge(self, cursor, user_id):
+        """Insert staged tags, recipes and links with set-based queries."""
+        recipe_table = Recipe._meta.db_table
+        tag_table = Tag._meta.db_table
+        link_table = Recipe.tags.through._meta.db_table
+
+        cursor.execute(f"""
+            UPDATE {STAGING_TABLE}
+            SET recipe_id = nextval(pg_get_serial_sequence(%s, 'id'))
+        """, [recipe_table])
+        recipes = cursor.rowcount
+
+        cursor.execute(f"""
+            INSERT INTO {tag_table} (user_id, name, recipe_count)
+            SELECT DISTINCT %s, tag.name, 0
+            FROM {STAGING_TABLE}, unnest(tags) AS tag(name)
+            ON CONFLICT (user_id, name) DO NOTHING
+        """, [user_id])
+        tags = cursor.rowcount
+
+        cursor.execute(f"""
+            INSERT INTO {recipe_table} (
+                id, user_id, title, description, time_minutes, price, link,
+                updated_at
+            )
+            SELECT
+                recipe_id, %s, title, description, time_minutes, price, link,
+                now()
+            FROM {STAGING_TABLE}
+            ORDER BY line_no
+        """, [user_id])
+
+        cursor.execute(f"""
+            INSERT INTO {link_table} (recipe_id, tag_id)
+            SELECT DISTINCT staging.recipe_id, tag.id
+            FROM {STAGING_TABLE} AS staging
+            CROSS JOIN LATERAL unnest(staging.tags) AS staged(name)
+            JOIN {tag_table} AS tag
+                ON tag.user_id = %s AND tag.name = staged.name
+        """, [user_id])
+        links = cursor.rowcount
+
+        cursor.execute(f"""
+            UPDATE {tag_table} AS tag
+            SET recipe_count = tag.recipe_count + added.count
+            FROM (
+                SELECT link.tag_id, count(*) AS count
+                FROM {link_table} AS link
+                JOIN {STAGING_TABLE} AS staging
+                    ON staging.recipe_id = link.recipe_id
+                GROUP BY link.tag_id
+            ) AS added
+            WHERE tag.id = added.tag_id
+        """)
+
+        self._merge_stats(cursor, user_id)
+
+        return {'recipes': recipes, 'tags': tags, 'links': links}
+
+    def _merge_stats(self, cursor, user_id):
+        """Add the staged recipes to the recipe stats of the user."""
+        stats_table = RecipeStats._meta.db_table
+        cursor.execute(f"""
+            INSERT INTO {stats_table} AS stats (
+                user_id, time_bucket, recipe_count, price_total, price_min,
+                price_max
+            )
+            SELECT
+                %s, width_bucket(time_minutes, %s::integer[]), count(*),
+                sum(price), min(price), max(price)
+            FROM {STAGING_TABLE}
+            GROUP BY 2
+            ON CONFLICT (user_id, time_bucket) DO UPDATE SET
+                recipe_count = stats.recipe_count + excluded.recipe_count,
+                price_total = stats.price_total + excluded.price_total,
+                price_min = least(stats.price_min, excluded.price_min),
+                price_max = greatest(stats.price_max, excluded.price_max)
+        """, [user_id, TIME_BUCKETS])
@@ -0,0 +1,119 @@
+"""
+Django command to rebuild the recipe stats summary table.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+
+from core.models import Recipe, RecipeStats, time_bucket_expression
+from recipe.cache import bump_version
+
+STATS_FIELDS = ['recipe_count', 'price_total', 'price_min', 'price_max']
+CENT = Decimal('0.01')
+
+
+def compute_stats():
+    """Return the stats aggregated over all recipes, keyed by user/bucket."""
+    rows = Recipe.objects.annotate(
+        bucket=time_bucket_expression(),
+    ).values('user_id', 'bucket').annotate(
+        recipe_count=Count('id'),
+        price_total=Sum('price'),
+        price_min=Min('price'),
+        price_max=Max('price'),
+    ).order_by()
+
+    return {
+        (row['user_id'], row['bucket']): RecipeStats(
+            user_id=row['user_id'],
+            time_bucket=row['bucket'],
+            **{field: to_cents(row[field]) for field in STATS_FIELDS},
+        )
+        for row in rows.iterator()
+    }
+
+
+def to_cents(value):
+    """Round an aggregated price to cents.
+
+    SQLite aggregates decimals as floats, which would show as drift.
+    """
+    if isinstance(value, Decimal):
+        return value.quantize(CENT)
+
+    return value
+
+
+def stored_stats():
+    """Return the stored non-empty stats, keyed by user/bucket."""
+    return {
+        (stats.user_id, stats.time_bucket): stats
+        for stats in RecipeStats.objects.filter(
+            recipe_count__gt=0,
+        ).iterator()
+    }
+
+
+class Command(BaseCommand):
+    """Django command to recompute the recipe stats in bulk."""
+    help = 'Rebuild the recipe stats from the recipes and report any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, exit with an error if there is any.',
+        )
+
+    def handle(self, *args, **options):
+        """Compare the stored stats with the recipes and rebuild them."""
+        with transaction.atomic():
+            actual = compute_stats()
+            stored = stored_stats()
+            drifted = sorted(
+                key for key in actual.keys() | stored.keys()
+                if self._values(actual.get(key)) !=
+                self._values(stored.get(key))
+            )
+
+            for user_id, bucket in drifted:
+                self.stdout.write(
+                    f'User {user_id}, time bucket {bucket}: stored '
+                    f'{self._values(stored.get((user_id, bucket)))}, '
+                    f'actual {self._values(actual.get((user_id, bucket)))}'
+                )
+
+            if options['check']:
+                if drifted:
+                    raise CommandError(
+                        f'{len(drifted)} recipe stats rows have drifted.'
+                    )
+                self.stdout.write(self.style.SUCCESS(
+                    'Recipe stats are up to date.'
+                ))
+                return
+
+            RecipeStats.objects.all().delete()
+            RecipeStats.objects.bulk_create(
+                actual.values(),
+                batch_size=1000,
+            )
+            RecipeStats.objects.create_empty(
+                get_user_model().objects.values_list('id', flat=True),
+            )
+            for user_id in {user_id for user_id, _bucket in drifted}:
+                bump_version(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(actual)} recipe stats rows, '
+            f'{len(drifted)} had drifted.'
+        ))
+
+    def _values(self, stats):
+        if stats is None:
+            return None
+
+        return tuple(getattr(stats, field) for field in STATS_FIELDS)
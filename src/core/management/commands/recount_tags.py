@@ -0,0 +1,64 @@
+"""
+Django command to recompute the denormalized recipe counts of tags.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Recipe, Tag
+from recipe.cache import bump_version
+
+
+class Command(BaseCommand):
+    """Django command to recount the recipes of every tag."""
+    help = 'Recompute tag recipe counts and report any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, exit with an error if there is any.',
+        )
+
+    def handle(self, *args, **options):
+        """Compare the stored counts with the links and fix drift."""
+        with transaction.atomic():
+            drifted = Tag.objects.annotate(
+                actual=Count('recipe'),
+            ).exclude(recipe_count=F('actual'))
+
+            user_ids = set()
+            reported = 0
+            for tag in drifted.order_by('id').iterator():
+                user_ids.add(tag.user_id)
+                reported += 1
+                self.stdout.write(
+                    f'Tag {tag.id} ({tag.name}): stored {tag.recipe_count}, '
+                    f'actual {tag.actual}'
+                )
+
+            if options['check']:
+                if reported:
+                    raise CommandError(
+                        f'{reported} tag recipe counts have drifted.'
+                    )
+                self.stdout.write(self.style.SUCCESS(
+                    'Tag recipe counts are up to date.'
+                ))
+                return
+
+            # Recount in the update itself so links changed since the
+            # report are not overwritten with a stale count.
+            counts = Recipe.tags.through.objects.filter(
+                tag_id=OuterRef('pk'),
+            ).values('tag_id').annotate(count=Count('id')).values('count')
+            fixed = Tag.objects.filter(
+                pk__in=drifted.values('pk'),
+            ).update(recipe_count=Coalesce(Subquery(counts), 0))
+            for user_id in user_ids:
+                bump_version(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Fixed {fixed} tag recipe counts.'
+        ))
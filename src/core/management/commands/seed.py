@@ -0,0 +1,347 @@
+"""
+Django command to generate a synthetic dataset for scale testing.
+
+Rows are written in batches of ``--batch-size``, each in its own
+transaction, so a multi-million row run never holds one huge
+transaction or all of a power user's rows in memory. An interrupted run
+keeps the batches written so far. Delete its users, or seed again with
+another ``--email-domain``.
+"""
+import itertools
+import random
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import TIME_BUCKETS, Recipe, RecipeStats, Tag, time_bucket
+
+DISTRIBUTIONS = ['fixed', 'uniform', 'zipf']
+
+DISHES = [
+    'Curry', 'Stew', 'Salad', 'Soup', 'Pasta', 'Risotto', 'Tacos', 'Pie',
+    'Noodles', 'Stir Fry', 'Omelette', 'Burger', 'Casserole', 'Bowl',
+]
+INGREDIENTS = [
+    'Chicken', 'Beef', 'Tofu', 'Salmon', 'Mushroom', 'Lentil', 'Pumpkin',
+    'Spinach', 'Tomato', 'Prawn', 'Pork', 'Chickpea', 'Aubergine', 'Egg',
+]
+TAG_NAMES = [
+    'Dinner', 'Lunch', 'Breakfast', 'Vegan', 'Vegetarian', 'Quick',
+    'Spicy', 'Dessert', 'Gluten Free', 'Healthy', 'Comfort', 'Baking',
+    'Italian', 'Japanese', 'Mexican', 'Indian', 'Thai', 'French',
+]
+
+
+def zipf_weights(count, exponent):
+    """Return the Zipf weights of ranks 1 to count."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def allocate(rng, users, mean, distribution, exponent):
+    """Return how many rows each user gets, averaging mean per user.
+
+    With ``zipf`` the counts follow the Zipf weights of randomly ordered
+    ranks, so a few users hold most of the rows.
+    """
+    if distribution == 'fixed':
+        return [mean] * users
+    if distribution == 'uniform':
+        return [rng.randint(0, 2 * mean) for _ in range(users)]
+
+    weights = zipf_weights(users, exponent)
+    scale = mean * users / sum(weights)
+    counts = [round(weight * scale) for weight in weights]
+    rng.shuffle(counts)
+
+    return counts
+
+
+def tag_name(index):
+    """Return a unique tag name for the index."""
+    name = TAG_NAMES[index % len(TAG_NAMES)]
+    if index >= len(TAG_NAMES):
+        name = f'{name} {index // len(TAG_NAMES) + 1}'
+
+    return name
+
+
+class Batch:
+    """Rows generated since the last write, written together."""
+
+    def __init__(self):
+        self.tags = []
+        self.recipes = []
+        self.links = []
+        self.stats = []
+
+    def __len__(self):
+        return len(self.tags) + len(self.recipes) + len(self.links) + \
+            len(self.stats)
+
+
+class Command(BaseCommand):
+    """Django command to seed users, tags and recipes in bulk."""
+    help = 'Generate a reproducible synthetic dataset of users and recipes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=100,
+            help='Number of users to create.',
+        )
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=50,
+            help='Mean number of recipes per user.',
+        )
+        parser.add_argument(
+            '--recipe-distribution',
+            choices=DISTRIBUTIONS,
+            default='zipf',
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=10,
+            help='Mean number of tags per user.',
+        )
+        parser.add_argument(
+            '--tag-distribution',
+            choices=DISTRIBUTIONS,
+            default='uniform',
+        )
+        parser.add_argument(
+            '--tags-per-recipe',
+            type=int,
+            default=3,
+            help='Maximum number of tags of a recipe, popular tags first.',
+        )
+        parser.add_argument(
+            '--zipf-exponent',
+            type=float,
+            default=1.1,
+            help='Skew of the Zipf distributions.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows buffered before they are written.',
+        )
+        parser.add_argument(
+            '--email-domain',
+            default='seed.example.com',
+            help='Domain of the generated user emails.',
+        )
+        parser.add_argument(
+            '--password',
+            default='password123',
+            help='Password of every generated user.',
+        )
+
+    def handle(self, *args, **options):
+        """Generate the users, then their tags and recipes in batches."""
+        for option in ['users', 'recipes', 'tags', 'tags_per_recipe']:
+            if options[option] < 0:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} must not be negative.'
+                )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        domain = options['email_domain']
+        if get_user_model().objects.filter(
+            email__endswith=f'@{domain}',
+        ).exists():
+            raise CommandError(
+                f'Users @{domain} already exist, use another --email-domain.'
+            )
+
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.copy = connection.vendor == 'postgresql'
+
+        rng = random.Random(options['seed'])
+        recipe_counts = allocate(
+            rng,
+            options['users'],
+            options['recipes'],
+            options['recipe_distribution'],
+            options['zipf_exponent'],
+        )
+        tag_counts = allocate(
+            rng,
+            options['users'],
+            options['tags'],
+            options['tag_distribution'],
+            options['zipf_exponent'],
+        )
+
+        users = self._create_users(options['users'], domain)
+        self.batch = Batch()
+        for index, user in enumerate(users):
+            self._generate(
+                user,
+                random.Random(f'{options["seed"]}:{index}'),
+                recipe_counts[index],
+                tag_counts[index],
+            )
+        self._write()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users, {sum(tag_counts)} tags and '
+            f'{sum(recipe_counts)} recipes.'
+        ))
+
+    def _create_users(self, count, domain):
+        """Create the users sharing one password hash."""
+        password = make_password(self.options['password'])
+
+        return get_user_model().objects.bulk_create(
+            [
+                get_user_model()(
+                    email=f'user{index}@{domain}',
+                    name=f'Seed User {index}',
+                    password=password,
+                )
+                for index in range(count)
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _generate(self, user, rng, recipe_count, tag_count):
+        """Add the tags, recipes and stats of a user to the batches.
+
+        The tags go first, so they are written no later than their first
+        links, and a full batch is written even in the middle of a user.
+        """
+        tags = [
+            Tag(user_id=user.id, name=tag_name(index))
+            for index in range(tag_count)
+        ]
+        self.batch.tags.extend(tags)
+        cum_weights = list(itertools.accumulate(
+            zipf_weights(tag_count, self.options['zipf_exponent'])
+        ))
+        tags_per_recipe = min(self.options['tags_per_recipe'], tag_count)
+        stats = {
+            bucket: RecipeStats(
+                user_id=user.id,
+                time_bucket=bucket,
+                price_total=Decimal(0),
+            )
+            for bucket in range(len(TIME_BUCKETS) + 1)
+        }
+
+        for _ in range(recipe_count):
+            recipe = self._recipe(user, rng)
+            self.batch.recipes.append(recipe)
+            picked = rng.choices(
+                range(tag_count),
+                cum_weights=cum_weights,
+                k=rng.randint(0, tags_per_recipe),
+            ) if tags_per_recipe else []
+            for index in set(picked):
+                self.batch.links.append((recipe, tags[index]))
+
+            row = stats[time_bucket(recipe.time_minutes)]
+            row.recipe_count += 1
+            row.price_total += recipe.price
+            if row.price_min is None or recipe.price < row.price_min:
+                row.price_min = recipe.price
+            if row.price_max is None or recipe.price > row.price_max:
+                row.price_max = recipe.price
+
+            if len(self.batch) >= self.batch_size:
+                self._write()
+
+        self.batch.stats.extend(stats.values())
+
+    def _recipe(self, user, rng):
+        """Return a random unsaved recipe of the user."""
+        ingredient = rng.choice(INGREDIENTS)
+        dish = rng.choice(DISHES)
+        sentence = f'A {dish.lower()} with {ingredient.lower()}. '
+        # Log-normal, most recipes take around half an hour and cost ~10.
+        minutes = round(rng.lognormvariate(3.4, 0.7))
+        price = rng.lognormvariate(2.3, 0.6)
+
+        return Recipe(
+            user_id=user.id,
+            title=f'{ingredient} {dish}',
+            description=sentence * rng.randint(0, 5),
+            time_minutes=min(600, max(1, minutes)),
+            price=Decimal(f'{min(max(price, 0.5), 999.99):.2f}'),
+            link=f'https://example.com/recipes/{rng.getrandbits(32):08x}',
+            updated_at=self.now,
+        )
+
+    def _write(self):
+        """Write and commit the current batch, tags and recipes first."""
+        batch, self.batch = self.batch, Batch()
+        if not len(batch):
+            return
+
+        Link = Recipe.tags.through
+        with transaction.atomic():
+            self._insert(Tag, batch.tags)
+            self._insert(Recipe, batch.recipes)
+            self._insert(Link, [
+                Link(recipe_id=recipe.id, tag_id=tag.id)
+                for recipe, tag in batch.links
+            ], returning=False)
+            Tag.objects.adjust_recipe_counts(
+                Counter(tag.id for _recipe, tag in batch.links),
+            )
+            self._insert(RecipeStats, batch.stats, returning=False)
+
+        self.stdout.write(
+            f'Wrote {len(batch.recipes)} recipes and '
+            f'{len(batch.links)} tag links.'
+        )
+
+    def _insert(self, model, objs, returning=True):
+        """Insert objects, setting their ids if returning is set.
+
+        PostgreSQL streams the rows with COPY, reserving the ids from the
+        sequence first. Other databases use batched INSERTs.
+        """
+        if not objs:
+            return
+        if not self.copy:
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+            return
+
+        table = model._meta.db_table
+        fields = [
+            field for field in model._meta.concrete_fields
+            if returning or not field.primary_key
+        ]
+        with connection.cursor() as cursor:
+            if returning:
+                cursor.execute("""
+                    SELECT nextval(pg_get_serial_sequence(%s, 'id'))
+                    FROM generate_series(1, %s)
+                """, [table, len(objs)])
+                for obj, (pk,) in zip(objs, cursor.fetchall()):
+                    obj.pk = pk
+
+            columns = ', '.join(
+                connection.ops.quote_name(field.column) for field in fields
+            )
+            with cursor.copy(
+                f'COPY {table} ({columns}) FROM STDIN'
+            ) as copy:
+                for obj in objs:
+                    copy.write_row([
+                        getattr(obj, field.attname) for field in fields
+                    ])
@@ -0,0 +1,448 @@
+"""
+Request metrics exported in the Prometheus text format.
+
+Each process records per route latency, SQL query count and time,
+response size and status codes in fixed histogram buckets. With
+``METRICS_DIR`` set, a background thread of each process writes a
+snapshot of its metrics to ``<METRICS_DIR>/<pid>.json`` every
+``METRICS_FLUSH_INTERVAL`` seconds and the ``/metrics`` view adds up the
+snapshots of all processes. Clear the
+directory when the server starts, like the multiprocess mode of the
+Prometheus client.
+"""
+import atexit
+import hmac
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from core.queries import observe_queries
+
+LATENCY_BUCKETS = [
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+]
+QUERY_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576]
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueries:
+    """Number and duration of the SQL queries of one request."""
+    __slots__ = ['count', 'duration']
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def record(self, sql, duration):
+        """Add a query and its duration in seconds."""
+        self.count += 1
+        self.duration += duration
+
+
+class RouteMetrics:
+    """Metrics of one route and method."""
+    __slots__ = [
+        'latency', 'latency_sum', 'queries', 'queries_sum', 'query_seconds',
+        'size', 'size_sum', 'statuses',
+    ]
+
+    def __init__(self):
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.queries = [0] * (len(QUERY_BUCKETS) + 1)
+        self.queries_sum = 0
+        self.query_seconds = 0.0
+        self.size = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+        self.statuses = {}
+
+    def observe(self, duration, queries, size, status_code):
+        """Add a request to the metrics."""
+        self.latency[bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.latency_sum += duration
+        self.queries[bisect_left(QUERY_BUCKETS, queries.count)] += 1
+        self.queries_sum += queries.count
+        self.query_seconds += queries.duration
+        self.size[bisect_left(SIZE_BUCKETS, size)] += 1
+        self.size_sum += size
+        self.statuses[status_code] = self.statuses.get(status_code, 0) + 1
+
+    def snapshot(self):
+        """Return the metrics as JSON serializable data."""
+        return {
+            'latency': list(self.latency),
+            'latency_sum': self.latency_sum,
+            'queries': list(self.queries),
+            'queries_sum': self.queries_sum,
+            'query_seconds': self.query_seconds,
+            'size': list(self.size),
+            'size_sum': self.size_sum,
+            'statuses': {
+                str(code): count for code, count in self.statuses.items()
+            },
+        }
+
+
+class Registry:
+    """Metrics of the requests served by this process."""
+
+    def __init__(self):
+        self.routes = {}
+        self.cache_requests = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher_pid = None
+
+    def observe(self, route, method, duration, queries, size, status_code):
+        """Record a request and write a snapshot if one is due."""
+        with self._lock:
+            methods = self.routes.get(route)
+            if methods is None:
+                methods = self.routes[route] = {}
+            metrics = methods.get(method)
+            if metrics is None:
+                metrics = methods[method] = RouteMetrics()
+            metrics.observe(duration, queries, size, status_code)
+
+        if settings.METRICS_DIR and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def count_cache(self, cache, hit):
+        """Record a lookup in one of the API caches."""
+        result = 'hit' if hit else 'miss'
+        with self._lock:
+            results = self.cache_requests.get(cache)
+            if results is None:
+                results = self.cache_requests[cache] = {}
+            results[result] = results.get(result, 0) + 1
+
+    def snapshot(self):
+        """Return the metrics of this process as JSON serializable data."""
+        from core.authentication import token_cache
+        from core.backends.postgresql.base import pool_stats
+
+        with self._lock:
+            routes = {
+                route: {
+                    method: metrics.snapshot()
+                    for method, metrics in methods.items()
+                }
+                for route, methods in self.routes.items()
+            }
+            cache_requests = {
+                cache: dict(results)
+                for cache, results in self.cache_requests.items()
+            }
+        cache_requests['token'] = {
+            'hit': token_cache.hits,
+            'miss': token_cache.misses,
+        }
+
+        return {
+            'routes': routes,
+            'cache_requests': cache_requests,
+            'pools': pool_stats(),
+        }
+
+    def flush(self):
+        """Write the snapshot of this process to ``METRICS_DIR``."""
+        directory = settings.METRICS_DIR
+        with self._flush_lock:
+            snapshot = self.snapshot()
+            fd, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as stream:
+                json.dump(snapshot, stream)
+            os.replace(path, os.path.join(directory, f'{os.getpid()}.json'))
+
+    def _start_flusher(self):
+        """Start the thread writing snapshots, once per process.
+
+        It is started on the first request rather than on import, so
+        workers forked from a preloaded server get their own.
+        """
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+
+        threading.Thread(
+            target=self._flush_periodically,
+            name='metrics-flush',
+            daemon=True,
+        ).start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            if not settings.METRICS_DIR:
+                continue
+            try:
+                self.flush()
+            except OSError:
+                logger.exception('Could not write the metrics snapshot.')
+
+    def reset(self):
+        """Forget every recorded metric."""
+        with self._lock:
+            self.routes.clear()
+            self.cache_requests.clear()
+
+
+registry = Registry()
+
+
+@atexit.register
+def flush_on_exit():
+    """Write the final snapshot of a process that recorded requests."""
+    if settings.configured and settings.METRICS_DIR and registry.routes:
+        registry.flush()
+
+
+def merge(total, snapshot):
+    """Add a snapshot to a running total, in place."""
+    for key, value in snapshot.items():
+        if isinstance(value, dict):
+            merge(total.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            current = total.setdefault(key, [0] * len(value))
+            for index, item in enumerate(value):
+                current[index] += item
+        else:
+            total[key] = total.get(key, 0) + value
+
+    return total
+
+
+def process_alive(pid):
+    """Return whether a process with the given id is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def collect():
+    """Return the metrics of every process.
+
+    Pool stats are current values, so only processes still running
+    contribute to them.
+    """
+    directory = settings.METRICS_DIR
+    if not directory:
+        return registry.snapshot()
+
+    registry.flush()
+    total = {}
+    for name in sorted(os.listdir(directory)):
+        pid, ext = os.path.splitext(name)
+        if ext != '.json' or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, name)) as stream:
+                snapshot = json.load(stream)
+        except (OSError, ValueError):
+            continue
+        if not process_alive(int(pid)):
+            snapshot.pop('pools', None)
+        merge(total, snapshot)
+
+    return total
+
+
+def format_labels(labels):
+    """Return a Prometheus label set."""
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'),
+        )
+        for name, value in labels.items()
+    )
+
+    return f'{{{pairs}}}'
+
+
+def format_value(value):
+    """Return a sample value in the Prometheus format."""
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def histogram_lines(name, labels, buckets, counts, total):
+    """Yield the sample lines of a histogram."""
+    cumulative = 0
+    for bound, count in zip(buckets + [math.inf], counts):
+        cumulative += count
+        bucket_labels = dict(labels, le=format_value(float(bound)))
+        yield f'{name}_bucket{format_labels(bucket_labels)} {cumulative}'
+    yield f'{name}_sum{format_labels(labels)} {format_value(total)}'
+    yield f'{name}_count{format_labels(labels)} {cumulative}'
+
+
+def render(metrics):
+    """Return the metrics in the Prometheus text format."""
+    histograms = [
+        ('http_request_duration_seconds', 'Request latency.',
+         LATENCY_BUCKETS, 'latency', 'latency_sum'),
+        ('http_request_queries', 'SQL queries per request.',
+         QUERY_BUCKETS, 'queries', 'queries_sum'),
+        ('http_response_size_bytes', 'Response body size.',
+         SIZE_BUCKETS, 'size', 'size_sum'),
+    ]
+    routes = [
+        ({'route': route, 'method': method}, methods[method])
+        for route, methods in sorted(metrics.get('routes', {}).items())
+        for method in sorted(methods)
+    ]
+
+    lines = []
+    for name, help_text, buckets, key, sum_key in histograms:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels, data in routes:
+            lines += histogram_lines(
+                name, labels, buckets, data[key], data[sum_key],
+            )
+
+    name = 'http_request_query_seconds_total'
+    lines += [
+        f'# HELP {name} Time spent in SQL queries.',
+        f'# TYPE {name} counter',
+    ]
+    for labels, data in routes:
+        lines.append(
+            f'{name}{format_labels(labels)} '
+            f'{format_value(data["query_seconds"])}'
+        )
+
+    name = 'http_responses_total'
+    lines += [
+        f'# HELP {name} Responses by status code.',
+        f'# TYPE {name} counter',
+    ]
+    for labels, data in routes:
+        for code, count in sorted(data['statuses'].items()):
+            lines.append(
+                f'{name}{format_labels(dict(labels, status=code))} {count}'
+            )
+
+    name = 'api_cache_requests_total'
+    lines += [
+        f'# HELP {name} Lookups in the API caches.',
+        f'# TYPE {name} counter',
+    ]
+    for cache, results in sorted(metrics.get('cache_requests', {}).items()):
+        for result, count in sorted(results.items()):
+            labels = {'cache': cache, 'result': result}
+            lines.append(f'{name}{format_labels(labels)} {count}')
+
+    pools = metrics.get('pools', {})
+    for stat in sorted({stat for stats in pools.values() for stat in stats}):
+        name = f'db_pool_{stat}'
+        lines.append(f'# TYPE {name} gauge')
+        for alias, stats in sorted(pools.items()):
+            if stat in stats:
+                lines.append(
+                    f'{name}{format_labels({"alias": alias})} {stats[stat]}'
+                )
+
+    return '\n'.join(lines) + '\n'
+
+
+def route_name(request):
+    """Return the route label of a request, bounded by the URL conf."""
+    match = request.resolver_match
+    if match is None:
+        return 'unmatched'
+
+    return match.view_name or match.route
+
+
+def response_size(response):
+    """Return the size of a response body, 0 if it is streamed."""
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """Record latency, SQL queries, size and status of every request.
+
+    Place it first so the latency covers the other middleware and the
+    size is the body as sent, after compression.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = RequestQueries()
+        start = time.perf_counter()
+        with observe_queries(queries.record):
+            response = self.get_response(request)
+        self.observe(request, response, start, queries)
+
+        return response
+
+    async def __acall__(self, request):
+        queries = RequestQueries()
+        start = time.perf_counter()
+        with observe_queries(queries.record):
+            response = await self.get_response(request)
+        self.observe(request, response, start, queries)
+
+        return response
+
+    def observe(self, request, response, start, queries):
+        registry.observe(
+            route_name(request),
+            request.method,
+            time.perf_counter() - start,
+            queries,
+            response_size(response),
+            response.status_code,
+        )
+
+
+def metrics_view(request):
+    """Serve the metrics of all processes to Prometheus.
+
+    Requires ``Authorization: Bearer <METRICS_TOKEN>``. Without a token
+    the metrics are only served with ``METRICS_PUBLIC`` set.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        given = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(given.encode(), expected.encode()):
+            return HttpResponseForbidden()
+    elif not settings.METRICS_PUBLIC:
+        return HttpResponseForbidden()
+
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
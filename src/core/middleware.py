@@ -0,0 +1,220 @@
+"""
+Middleware for the API.
+"""
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class Codec:
+    """A content coding with one-shot and streaming compression.
+
+    ``compressor`` returns an object with ``compress(chunk)``, which
+    returns the compressed chunk flushed so far, and ``finish()``.
+    """
+
+    def __init__(self, name, compress, compressor):
+        self.name = name
+        self.compress = compress
+        self.compressor = compressor
+
+    def stream(self, chunks):
+        """Compress an iterable of chunks, flushing after each one."""
+        compressor = self.compressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    async def astream(self, chunks):
+        """Compress an async iterable of chunks, flushing after each one."""
+        compressor = self.compressor()
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class GzipCompressor:
+    """Streaming gzip compressor."""
+
+    def __init__(self):
+        self.compressobj = zlib.compressobj(6, zlib.DEFLATED, 16 + 15)
+
+    def compress(self, chunk):
+        return self.compressobj.compress(chunk) + \
+            self.compressobj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressobj.flush()
+
+
+class BrotliCompressor:
+    """Streaming brotli compressor."""
+
+    def __init__(self):
+        self.compressobj = brotli.Compressor(quality=4)
+
+    def compress(self, chunk):
+        return self.compressobj.process(chunk) + self.compressobj.flush()
+
+    def finish(self):
+        return self.compressobj.finish()
+
+
+class ZstdCompressor:
+    """Streaming zstd compressor."""
+
+    def __init__(self):
+        self.compressobj = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, chunk):
+        return self.compressobj.compress(chunk) + self.compressobj.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        return self.compressobj.flush()
+
+
+def get_codecs():
+    """Return the available codecs in order of server preference."""
+    codecs = []
+    if brotli is not None:
+        codecs.append(Codec(
+            'br',
+            lambda data: brotli.compress(data, quality=4),
+            BrotliCompressor,
+        ))
+    if zstandard is not None:
+        codecs.append(Codec(
+            'zstd',
+            zstandard.ZstdCompressor(level=3).compress,
+            ZstdCompressor,
+        ))
+    codecs.append(Codec(
+        'gzip',
+        lambda data: compress_string(data, max_random_bytes=100),
+        GzipCompressor,
+    ))
+
+    return codecs
+
+
+def parse_accept_encoding(header):
+    """Return a mapping of content codings to their quality values."""
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    return accepted
+
+
+def negotiate(header, codecs):
+    """Return the preferred codec accepted by the client, if any."""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for codec in codecs:
+        quality = accepted.get(codec.name, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = codec, quality
+
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with the best coding the client accepts.
+
+    Supports gzip, plus brotli and zstd when their packages are
+    installed. Bodies smaller than ``COMPRESSION_MIN_SIZE`` are left
+    alone, streaming responses are compressed chunk by chunk. Responses
+    flagged with ``cache_compressed``, i.e. served from the response
+    cache, keep their compressed bytes in the cache, keyed by content
+    digest, so repeated hits are not compressed again.
+    """
+    codecs = get_codecs()
+
+    def process_response(self, request, response):
+        if not response.streaming and \
+                len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        codec = negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            self.codecs,
+        )
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = codec.astream(
+                    response.streaming_content
+                )
+            else:
+                response.streaming_content = codec.stream(
+                    response.streaming_content
+                )
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress(codec, response)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+
+        return response
+
+    def compress(self, codec, response):
+        """Compress the response body, reusing cached bytes if flagged."""
+        if not getattr(response, 'cache_compressed', False):
+            return codec.compress(response.content)
+
+        cache = caches[settings.COMPRESSION_CACHE_ALIAS]
+        digest = hashlib.sha256(response.content).hexdigest()
+        key = f'compressed:{codec.name}:{digest}'
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = codec.compress(response.content)
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+
+        return compressed
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.3 on 2026-10-18 04:21
+
+from django.db import migrations, models
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """Fold tags sharing a (user, name) pair into the oldest one."""
+    Tag = apps.get_model('core', 'Tag')
+    RecipeTag = apps.get_model('core', 'Recipe').tags.through
+
+    duplicates = (
+        Tag.objects.values('user_id', 'name')
+        .annotate(count=models.Count('id'), keep_id=models.Min('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        drop_ids = list(
+            Tag.objects.filter(
+                user_id=duplicate['user_id'],
+                name=duplicate['name'],
+            ).exclude(id=keep_id).values_list('id', flat=True)
+        )
+        linked = set(
+            RecipeTag.objects.filter(tag_id=keep_id)
+            .values_list('recipe_id', flat=True)
+        )
+        for link in RecipeTag.objects.filter(tag_id__in=drop_ids):
+            if link.recipe_id not in linked:
+                RecipeTag.objects.create(
+                    recipe_id=link.recipe_id,
+                    tag_id=keep_id,
+                )
+                linked.add(link.recipe_id)
+        Tag.objects.filter(id__in=drop_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_tag_recipe_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_tags,
+            migrations.RunPython.noop,
+        ),
+    ]
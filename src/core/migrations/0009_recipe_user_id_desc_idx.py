@@ -0,0 +1,48 @@
+# Generated by Django 4.2.3 on 2026-10-18 04:45
+
+from django.db import migrations, models
+
+USER_ID_INDEX = models.Index(
+    fields=['user', '-id'],
+    name='recipe_user_id_desc_idx',
+)
+
+
+def add_user_id_index(apps, schema_editor):
+    """Build the index without locking the table on PostgreSQL."""
+    Recipe = apps.get_model('core', 'Recipe')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(Recipe, USER_ID_INDEX, concurrently=True)
+    else:
+        schema_editor.add_index(Recipe, USER_ID_INDEX)
+
+
+def remove_user_id_index(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(Recipe, USER_ID_INDEX, concurrently=True)
+    else:
+        schema_editor.remove_index(Recipe, USER_ID_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_recipe_tags_tag_recipe_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='recipe',
+                    index=USER_ID_INDEX,
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_user_id_index, remove_user_id_index),
+            ],
+        ),
+    ]
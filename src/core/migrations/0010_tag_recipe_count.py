@@ -0,0 +1,36 @@
+# Generated by Django 4.2.3 on 2026-10-18 05:08
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_tag_recipes(apps, schema_editor):
+    """Fill in the recipe count of every tag with one update."""
+    Tag = apps.get_model('core', 'Tag')
+    RecipeTag = apps.get_model('core', 'Recipe').tags.through
+
+    counts = RecipeTag.objects.filter(
+        tag_id=models.OuterRef('pk'),
+    ).values('tag_id').annotate(count=models.Count('id')).values('count')
+    Tag.objects.update(
+        recipe_count=Coalesce(models.Subquery(counts), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_user_id_desc_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            count_tag_recipes,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.3 on 2026-10-18 05:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def summarize_recipes(apps, schema_editor):
+    """Fill in the recipe stats from the existing recipes."""
+    User = apps.get_model('core', 'User')
+    Recipe = apps.get_model('core', 'Recipe')
+    RecipeStats = apps.get_model('core', 'RecipeStats')
+
+    bucket = models.Case(
+        *[
+            models.When(time_minutes__lt=bound, then=index)
+            for index, bound in enumerate([15, 30, 60, 120])
+        ],
+        default=4,
+    )
+    rows = Recipe.objects.annotate(bucket=bucket).values(
+        'user_id', 'bucket',
+    ).annotate(
+        count=models.Count('id'),
+        total=models.Sum('price'),
+        low=models.Min('price'),
+        high=models.Max('price'),
+    ).order_by()
+    summaries = {(row['user_id'], row['bucket']): row for row in rows}
+
+    stats = []
+    for user_id in User.objects.values_list('id', flat=True).iterator():
+        for bucket in range(5):
+            row = summaries.get((user_id, bucket), {})
+            stats.append(RecipeStats(
+                user_id=user_id,
+                time_bucket=bucket,
+                recipe_count=row.get('count', 0),
+                price_total=row.get('total', 0),
+                price_min=row.get('low'),
+                price_max=row.get('high'),
+            ))
+    RecipeStats.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_tag_recipe_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time_bucket', models.PositiveSmallIntegerField()),
+                ('recipe_count', models.IntegerField(default=0)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('price_min', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('price_max', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='recipestats',
+            constraint=models.UniqueConstraint(fields=('user', 'time_bucket'), name='unique_recipe_stats_bucket_per_user'),
+        ),
+        migrations.RunPython(
+            summarize_recipes,
+            migrations.RunPython.noop,
+        ),
+    ]
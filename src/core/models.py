@@ -1,8 +1,15 @@
 """
 Database models
 """
+from bisect import bisect_right
+from collections import defaultdict
+from decimal import Decimal
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce, Greatest, Least
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -45,6 +52,14 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class RecipeManager(models.Manager):
+    """Manager for recipes."""
+
+    def get_queryset(self):
+        """Leave the search vector out of regular queries."""
+        return super().get_queryset().defer('search_vector')
+
+
 class Recipe(models.Model):
     """Recipe object."""
     user = models.ForeignKey(
@@ -57,11 +72,43 @@ class Recipe(models.Model):
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='recipe_user_id_desc_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class TagManager(models.Manager):
+    """Manager for tags."""
+
+    def adjust_recipe_counts(self, deltas):
+        """Add the given amounts to the recipe counts of tags by id."""
+        tag_ids = defaultdict(list)
+        for tag_id, delta in deltas.items():
+            if delta:
+                tag_ids[delta].append(tag_id)
+
+        for delta, ids in tag_ids.items():
+            self.filter(pk__in=ids).update(
+                recipe_count=models.F('recipe_count') + delta
+            )
+
+
 class Tag(models.Model):
     """Tag for filtering recipes."""
     name = models.CharField(max_length=255)
@@ -69,6 +116,172 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    objects = TagManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+# Upper bounds, exclusive, of the cooking time buckets in minutes. The last
+# bucket has no upper bound.
+TIME_BUCKETS = [15, 30, 60, 120]
+
+
+def time_bucket(minutes):
+    """Return the index of the cooking time bucket for minutes."""
+    return bisect_right(TIME_BUCKETS, minutes)
+
+
+def time_bucket_bounds(bucket):
+    """Return the lowest and highest minutes of a bucket.
+
+    The highest is None for the last bucket.
+    """
+    low = TIME_BUCKETS[bucket - 1] if bucket else 0
+    high = TIME_BUCKETS[bucket] - 1 if bucket < len(TIME_BUCKETS) else None
+
+    return low, high
+
+
+def time_bucket_expression():
+    """Return an expression computing the time bucket of recipes."""
+    return models.Case(
+        *[
+            models.When(time_minutes__lt=bound, then=index)
+            for index, bound in enumerate(TIME_BUCKETS)
+        ],
+        default=len(TIME_BUCKETS),
+    )
+
+
+def stats_values(recipe):
+    """Return the values of a recipe the stats are computed from."""
+    return recipe.user_id, recipe.time_minutes, recipe.price
+
+
+class RecipeStatsManager(models.Manager):
+    """Manager for recipe stats."""
+
+    def create_empty(self, user_ids):
+        """Create the empty stats rows of every time bucket for users.
+
+        With the rows in place recipe changes only ever update them.
+        """
+        self.bulk_create(
+            [
+                self.model(user_id=user_id, time_bucket=bucket)
+                for user_id in user_ids
+                for bucket in range(len(TIME_BUCKETS) + 1)
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    def record(self, added=(), removed=()):
+        """Apply recipes added to and removed from the summary.
+
+        Both are iterables of ``(user_id, time_minutes, price)``. Counts
+        and totals are updated with deltas. The price extremes of a bucket
+        are only recomputed from the recipes when a removed price was one
+        of them.
+        """
+        changes = {}
+        for sign, recipes in ((1, added), (-1, removed)):
+            for user_id, minutes, price in recipes:
+                change = changes.setdefault(
+                    (user_id, time_bucket(minutes)),
+                    {'count': 0, 'total': Decimal(0), 1: [], -1: []},
+                )
+                price = Decimal(str(price))
+                change['count'] += sign
+                change['total'] += sign * price
+                change[sign].append(price)
+
+        for (user_id, bucket), change in changes.items():
+            self._apply(user_id, bucket, change)
+
+    def _apply(self, user_id, bucket, change):
+        rows = self.filter(user_id=user_id, time_bucket=bucket)
+        values = {
+            'recipe_count': models.F('recipe_count') + change['count'],
+            'price_total': models.F('price_total') + change['total'],
+        }
+        if change[1]:
+            low, high = min(change[1]), max(change[1])
+            values['price_min'] = Least(Coalesce('price_min', low), low)
+            values['price_max'] = Greatest(Coalesce('price_max', high), high)
+
+        if not rows.update(**values) and change['count'] > 0:
+            try:
+                with transaction.atomic():
+                    self.create(
+                        user_id=user_id,
+                        time_bucket=bucket,
+                        recipe_count=change['count'],
+                        price_total=change['total'],
+                        price_min=low,
+                        price_max=high,
+                    )
+            except IntegrityError:
+                rows.update(**values)
+
+        if change[-1]:
+            low, high = time_bucket_bounds(bucket)
+            recipes = Recipe.objects.filter(
+                user_id=user_id,
+                time_minutes__gte=low,
+            ).values('user_id')
+            if high is not None:
+                recipes = recipes.filter(time_minutes__lte=high)
+            rows.filter(
+                models.Q(price_min__in=change[-1])
+                | models.Q(price_max__in=change[-1])
+            ).update(
+                price_min=models.Subquery(
+                    recipes.annotate(price=models.Min('price')).values('price')
+                ),
+                price_max=models.Subquery(
+                    recipes.annotate(price=models.Max('price')).values('price')
+                ),
+            )
+
+
+class RecipeStats(models.Model):
+    """Summary of the recipes of a user in one cooking time bucket.
+
+    Kept up to date incrementally as recipes change, see ``core.signals``,
+    so stats never aggregate over all recipes of a user.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    time_bucket = models.PositiveSmallIntegerField()
+    recipe_count = models.IntegerField(default=0)
+    price_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+    )
+    price_min = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    price_max = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+
+    objects = RecipeStatsManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'time_bucket'],
+                name='unique_recipe_stats_bucket_per_user',
+            ),
+        ]
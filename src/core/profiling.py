@@ -0,0 +1,208 @@
+"""
+Opt-in SQL profiling of requests.
+
+A sample of requests, ``SQL_PROFILING_SAMPLE_RATE``, records every SQL
+statement with its duration and a normalized fingerprint. Requests over
+the latency or query budget, or running the same fingerprint
+``SQL_PROFILING_REPEAT_LIMIT`` times or more, the N+1 pattern, are logged
+as JSON by the ``core.profiling`` logger. With ``SQL_PROFILING_STRICT``
+every request is profiled and a violation raises ``BudgetExceeded``, so
+tests making such a request fail.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core.queries import observe_queries
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_VALUES = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+# Statements expected to repeat, such as savepoints around nested
+# atomic blocks, are not reported as N+1 queries.
+_TRANSACTION = re.compile(
+    r'^(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|BEGIN|COMMIT)\b',
+    re.IGNORECASE,
+)
+
+
+class BudgetExceeded(AssertionError):
+    """A profiled request went over its budget in strict mode."""
+
+
+def fingerprint(sql):
+    """Return the statement with literals and value lists normalized.
+
+    Statements differing only in their parameters, or in the number of
+    items in an ``IN`` list, share a fingerprint.
+    """
+    sql = sql.replace('%s', '?')
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('(...)', sql)
+    sql = _VALUES.sub(r'\1', sql)
+
+    return _SPACE.sub(' ', sql).strip()
+
+
+class Profile:
+    """SQL statements run while profiling."""
+
+    def __init__(self):
+        self.statements = []
+
+    def record(self, sql, duration):
+        """Add a statement and its duration in seconds."""
+        self.statements.append((sql, duration))
+
+    @property
+    def query_count(self):
+        return len(self.statements)
+
+    @property
+    def query_time(self):
+        return sum(duration for _sql, duration in self.statements)
+
+    def repeated(self, limit):
+        """Return fingerprints run at least limit times, most first."""
+        counts = Counter()
+        durations = defaultdict(float)
+        for sql, duration in self.statements:
+            if _TRANSACTION.match(sql):
+                continue
+            key = fingerprint(sql)
+            counts[key] += 1
+            durations[key] += duration
+
+        return [
+            {
+                'fingerprint': key,
+                'count': count,
+                'time_ms': round(durations[key] * 1000, 3),
+            }
+            for key, count in counts.most_common()
+            if count >= limit
+        ]
+
+    def slowest(self, count=5):
+        """Return the slowest statements."""
+        statements = sorted(
+            self.statements,
+            key=lambda statement: statement[1],
+            reverse=True,
+        )
+
+        return [
+            {
+                'fingerprint': fingerprint(sql),
+                'time_ms': round(duration * 1000, 3),
+            }
+            for sql, duration in statements[:count]
+        ]
+
+
+@contextmanager
+def profile():
+    """Record the SQL statements run in the block into a ``Profile``."""
+    current = Profile()
+    with observe_queries(current.record):
+        yield current
+
+
+def check_budget(profile, duration):
+    """Return the budget violations of a profiled request."""
+    violations = []
+    if duration > settings.SQL_PROFILING_LATENCY_BUDGET:
+        violations.append('latency')
+    if profile.query_count > settings.SQL_PROFILING_QUERY_BUDGET:
+        violations.append('queries')
+    if profile.repeated(settings.SQL_PROFILING_REPEAT_LIMIT):
+        violations.append('repeated_queries')
+
+    return violations
+
+
+def report(request, response, profile, duration, violations):
+    """Return the JSON serializable report of a profiled request."""
+    match = request.resolver_match
+
+    return {
+        'event': 'sql_profile',
+        'method': request.method,
+        'path': request.path,
+        'route': match.view_name if match else None,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'query_count': profile.query_count,
+        'query_time_ms': round(profile.query_time * 1000, 3),
+        'violations': violations,
+        'repeated': profile.repeated(settings.SQL_PROFILING_REPEAT_LIMIT),
+        'slowest': profile.slowest(),
+    }
+
+
+class SQLProfilingMiddleware:
+    """Profile a sample of requests and report those over budget."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with profile() as current:
+            response = self.get_response(request)
+        self.check(request, response, current, start)
+
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        with profile() as current:
+            response = await self.get_response(request)
+        self.check(request, response, current, start)
+
+        return response
+
+    def sampled(self):
+        """Return whether to profile the current request."""
+        return settings.SQL_PROFILING_STRICT or \
+            random.random() < settings.SQL_PROFILING_SAMPLE_RATE
+
+    def check(self, request, response, current, start):
+        """Log a request over budget, and fail it in strict mode."""
+        duration = time.perf_counter() - start
+        violations = check_budget(current, duration)
+        if not violations:
+            return
+
+        data = report(request, response, current, duration, violations)
+        logger.warning('%s', json.dumps(data))
+        if settings.SQL_PROFILING_STRICT:
+            raise BudgetExceeded(
+                f'{request.method} {request.path} exceeded its budget: '
+                f'{json.dumps(data, indent=2)}'
+            )
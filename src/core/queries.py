@@ -0,0 +1,60 @@
+"""
+Timing of the SQL queries run in a block of code.
+
+One execute wrapper, installed once on every connection, times each
+statement and passes it to the observers of the current context. The
+request metrics and the SQL profiler are such observers. Observers are
+held in a context variable, which ``sync_to_async`` carries over to the
+threads running ORM calls of async views.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_observers = ContextVar('query_observers', default=())
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper passing the statement and its duration on."""
+    observers = _observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for observer in observers:
+            observer(sql, duration)
+
+
+def install(wrapper):
+    """Add the query timer to a database connection once.
+
+    It goes first, as ``execute_wrapper()`` removes the last wrapper when
+    its block ends.
+    """
+    if time_query not in wrapper.execute_wrappers:
+        wrapper.execute_wrappers.insert(0, time_query)
+
+
+@receiver(connection_created)
+def install_on_connection_created(sender, connection, **kwargs):
+    """Time the queries of connections opened in any thread."""
+    install(connection)
+
+
+@contextmanager
+def observe_queries(observer):
+    """Call observer with the SQL and duration of queries in the block."""
+    install(connection)
+    token = _observers.set(_observers.get() + (observer,))
+    try:
+        yield
+    finally:
+        _observers.reset(token)
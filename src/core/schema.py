@@ -0,0 +1,152 @@
+"""
+Prebuilt OpenAPI schema served from memory.
+
+The schema is generated once per code version, either by the
+``build_schema`` command, which writes it to ``SCHEMA_FILE``, or on the
+first request, and kept in memory with its rendered variants.
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.utils import encoders
+
+_lock = threading.Lock()
+_cache = {}
+_source_version = None
+
+
+def source_digest():
+    """Return a digest of the paths and contents of the source files.
+
+    It only depends on the code, so a schema built on one host matches
+    the same checkout on any other.
+    """
+    base = Path(settings.BASE_DIR)
+    digest = hashlib.sha256()
+    for path in sorted(base.rglob('*.py')):
+        digest.update(path.relative_to(base).as_posix().encode() + b'\0')
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+
+    return digest.hexdigest()[:16]
+
+
+def load_source_version():
+    """Compute the source digest once, at startup."""
+    global _source_version
+    _source_version = source_digest()
+
+
+def code_version():
+    """Return the deployed code version.
+
+    ``APP_VERSION`` is used when set, otherwise the source digest computed
+    at startup.
+    """
+    if settings.APP_VERSION:
+        return settings.APP_VERSION
+    if _source_version is None:
+        load_source_version()
+
+    return _source_version
+
+
+def generate_schema():
+    """Return a freshly generated schema for the public API."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+
+    return json.loads(json.dumps(
+        generator.get_schema(request=None, public=True),
+        cls=encoders.JSONEncoder,
+    ))
+
+
+def write_schema(path, version, schema):
+    """Write a schema for the given code version to path."""
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump({'version': version, 'schema': schema}, stream)
+
+
+def read_schema(path, version):
+    """Return the schema stored at path if it matches the code version."""
+    try:
+        with open(path, encoding='utf-8') as stream:
+            stored = json.load(stream)
+    except (OSError, ValueError):
+        return None
+
+    if stored.get('version') != version:
+        return None
+
+    return stored.get('schema')
+
+
+def get_schema():
+    """Return the cached schema state for the current code version."""
+    with _lock:
+        version = code_version()
+        if _cache.get('version') != version:
+            schema = None
+            if settings.SCHEMA_FILE:
+                schema = read_schema(settings.SCHEMA_FILE, version)
+            if schema is None:
+                schema = generate_schema()
+            _cache.clear()
+            _cache.update(version=version, schema=schema, rendered={})
+
+        return _cache
+
+
+def clear_schema():
+    """Forget the cached schema."""
+    with _lock:
+        _cache.clear()
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """Serve the prebuilt schema with an ETag.
+
+    Requests for a specific ``lang`` or ``version`` are generated on the
+    fly as before.
+    """
+
+    def _get_schema_response(self, request):
+        if request.GET.get('lang') or request.GET.get('version'):
+            return super()._get_schema_response(request)
+
+        state = get_schema()
+        renderer = request.accepted_renderer
+        media_type = request.accepted_media_type
+        rendered = state['rendered'].get(media_type)
+        if rendered is None:
+            content = renderer.render(
+                state['schema'],
+                media_type,
+                self.get_renderer_context(),
+            )
+            digest = hashlib.sha256(content).hexdigest()[:32]
+            rendered = state['rendered'][media_type] = (
+                content,
+                quote_etag(f'{state["version"]}-{digest}'),
+            )
+
+        content, etag = rendered
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = media_type
+            if renderer.charset:
+                content_type = f'{media_type}; charset={renderer.charset}'
+            response = HttpResponse(content, content_type=content_type)
+            response['Content-Disposition'] = \
+                f'inline; filename="{self._get_filename(request, None)}"'
+        response['ETag'] = etag
+
+        return response
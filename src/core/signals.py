@@ -0,0 +1,136 @@
+"""
+Signal handlers keeping denormalized model data up to date.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import (
+    Recipe,
+    RecipeStats,
+    Tag,
+    stats_values,
+)
+
+STATS_FIELDS = {'user', 'user_id', 'time_minutes', 'price'}
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_recipes_on_tags_changed(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    """Mark recipes as modified when their tags change."""
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif reverse and action in ('post_add', 'post_remove'):
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    elif reverse and action == 'pre_clear':
+        recipes = Recipe.objects.filter(tags=instance)
+    else:
+        return
+
+    recipes.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+def touch_recipes_on_tag_saved(sender, instance, created, **kwargs):
+    """Mark recipes as modified when one of their tags is renamed."""
+    if not created:
+        Recipe.objects.filter(tags=instance).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_recipes_on_tag_deleted(sender, instance, **kwargs):
+    """Mark recipes as modified when one of their tags is deleted."""
+    Recipe.objects.filter(tags=instance).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def count_recipes_on_tags_changed(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    """Keep the recipe counts of tags in step with recipe/tag links.
+
+    Removals are counted before the links are deleted, so only links
+    that actually exist are subtracted.
+    """
+    links = Recipe.tags.through.objects
+    if not reverse:
+        if action == 'post_add':
+            Tag.objects.adjust_recipe_counts(dict.fromkeys(pk_set, 1))
+        elif action == 'pre_remove':
+            Tag.objects.filter(pk__in=pk_set, recipe=instance).update(
+                recipe_count=F('recipe_count') - 1
+            )
+        elif action == 'pre_clear':
+            Tag.objects.filter(recipe=instance).update(
+                recipe_count=F('recipe_count') - 1
+            )
+    elif action == 'post_add':
+        Tag.objects.adjust_recipe_counts({instance.pk: len(pk_set)})
+    elif action == 'pre_remove':
+        removed = links.filter(tag=instance, recipe_id__in=pk_set).count()
+        Tag.objects.adjust_recipe_counts({instance.pk: -removed})
+    elif action == 'pre_clear':
+        Tag.objects.filter(pk=instance.pk).update(recipe_count=0)
+
+
+@receiver(pre_delete, sender=Recipe)
+def count_recipes_on_recipe_deleted(sender, instance, **kwargs):
+    """Take a deleted recipe off the counts of its tags."""
+    Tag.objects.filter(recipe=instance).update(
+        recipe_count=F('recipe_count') - 1
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def create_stats_on_user_created(sender, instance, created, raw, **kwargs):
+    """Create the empty recipe stats rows of a new user."""
+    if created and not raw:
+        RecipeStats.objects.create_empty([instance.pk])
+
+
+@receiver(pre_save, sender=Recipe)
+def load_stats_values(sender, instance, raw, update_fields, **kwargs):
+    """Remember the stored stats values of a recipe being updated."""
+    instance._stored_stats_values = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not STATS_FIELDS & set(update_fields):
+        return
+
+    instance._stored_stats_values = Recipe.objects.filter(
+        pk=instance.pk,
+    ).values_list('user_id', 'time_minutes', 'price').first()
+
+
+@receiver(post_save, sender=Recipe)
+def update_stats_on_recipe_saved(sender, instance, created, raw, **kwargs):
+    """Add a new or changed recipe to the stats."""
+    if raw:
+        return
+
+    if created:
+        RecipeStats.objects.record(added=[stats_values(instance)])
+        return
+
+    stored = getattr(instance, '_stored_stats_values', None)
+    if stored is not None and stored != stats_values(instance):
+        RecipeStats.objects.record(
+            added=[stats_values(instance)],
+            removed=[stored],
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def update_stats_on_recipe_deleted(sender, instance, **kwargs):
+    """Take a deleted recipe off the stats."""
+    RecipeStats.objects.record(removed=[stats_values(instance)])
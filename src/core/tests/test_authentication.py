@@ -0,0 +1,151 @@
+"""
+Tests for the cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import TokenCache, get_token_key, token_cache
+
+ME_URL = reverse('user:me')
+
+
+class TokenCacheTests(SimpleTestCase):
+    """Test the token cache."""
+
+    def test_get_counts_hits_and_misses(self):
+        """Test lookups update the hit and miss counters."""
+        cache = TokenCache(max_size=10, ttl=60)
+        user = get_user_model()(pk=1, email='test@example.com')
+
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', user, 'token')
+        cached_user, token = cache.get('key')
+
+        self.assertEqual(cached_user.pk, user.pk)
+        self.assertIsNot(cached_user, user)
+        self.assertEqual(token, 'token')
+        self.assertEqual(cache.stats(), {
+            'hits': 1,
+            'misses': 1,
+            'size': 1,
+            'max_size': 10,
+        })
+
+    def test_least_recently_used_entry_evicted(self):
+        """Test the cache never grows beyond its maximum size."""
+        cache = TokenCache(max_size=2, ttl=60)
+        for key in ['a', 'b']:
+            cache.set(key, get_user_model()(pk=1), key)
+        cache.get('a')
+        cache.set('c', get_user_model()(pk=1), 'c')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+    @patch('core.authentication.time.monotonic')
+    def test_expired_entry_is_a_miss(self, patched_monotonic):
+        """Test entries are dropped once their TTL has passed."""
+        cache = TokenCache(max_size=10, ttl=60)
+        patched_monotonic.return_value = 100
+        cache.set('key', get_user_model()(pk=1), 'key')
+
+        patched_monotonic.return_value = 161
+
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+
+class GetTokenKeyTests(SimpleTestCase):
+    """Test reading the token key from the Authorization header."""
+
+    def get_key(self, header):
+        """Return the key parsed from a request with the header."""
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=header)
+
+        return get_token_key(request, 'Token')
+
+    def test_key_returned(self):
+        """Test the key following the keyword is returned."""
+        self.assertEqual(self.get_key('token abc123'), 'abc123')
+
+    def test_other_keyword_ignored(self):
+        """Test headers of other schemes are left to other classes."""
+        self.assertIsNone(self.get_key('Bearer abc123'))
+        self.assertIsNone(self.get_key(''))
+
+    def test_malformed_header_rejected(self):
+        """Test malformed headers fail with DRF's messages."""
+        for header, message in [
+            ('Token', 'No credentials provided.'),
+            ('Token abc 123', 'should not contain spaces.'),
+        ]:
+            with self.subTest(header=header):
+                with self.assertRaisesMessage(
+                    exceptions.AuthenticationFailed, message,
+                ):
+                    self.get_key(header)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating requests with cached tokens."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='password123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeated_requests_skip_token_query(self):
+        """Test the token lookup only hits the database once."""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating immediately."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user stops authenticating immediately."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_not_stale(self):
+        """Test updating the profile is reflected in later requests."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New Name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
@@ -1,11 +1,28 @@
 """
 Test custom Django management commands
 """
+import io
+import json
+import os
+import random
+import tempfile
+from decimal import Decimal
+from unittest import skipIf, skipUnless
 from unittest.mock import patch
 import psycopg
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core.management.commands import (
+    import_recipes,
+    rebuild_recipe_stats,
+    seed,
+)
+from core.models import Recipe, RecipeStats, Tag
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -30,3 +47,349 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='password123',
+        )
+
+    def write_file(self, suffix, content):
+        """Write content to a temporary file and return its path."""
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_read_ndjson(self):
+        """Test NDJSON records are parsed into staging rows."""
+        stream = io.StringIO(
+            json.dumps({
+                'title': 'Curry',
+                'time_minutes': 30,
+                'price': '5.25',
+                'tags': ['Dinner', 'Spicy', 'Dinner'],
+            }) + '\n\n'
+        )
+
+        rows = list(import_recipes.read_ndjson(stream))
+
+        self.assertEqual(rows, [
+            (1, 'Curry', '', 30, Decimal('5.25'), '', ['Dinner', 'Spicy']),
+        ])
+
+    def test_read_csv(self):
+        """Test CSV lines are parsed into staging rows."""
+        stream = io.StringIO(
+            'id,title,description,time_minutes,price,link,tags\r\n'
+            '7,"Curry, hot",Nice,30,5.25,,Dinner|Spicy\r\n'
+        )
+
+        rows = list(import_recipes.read_csv(stream))
+
+        self.assertEqual(rows, [
+            (2, 'Curry, hot', 'Nice', 30, Decimal('5.25'), '',
+             ['Dinner', 'Spicy']),
+        ])
+
+    def test_read_invalid_record(self):
+        """Test an invalid record reports its line number."""
+        stream = io.StringIO('{"title": "Curry", "price": "1.00"}\n')
+
+        with self.assertRaisesMessage(CommandError, 'line 1'):
+            list(import_recipes.read_ndjson(stream))
+
+    def test_read_too_long_values(self):
+        """Test values too long for their columns report the line."""
+        records = [
+            {'title': 'x' * 256},
+            {'link': 'x' * 256},
+            {'tags': ['Dinner', 'x' * 256]},
+            {'price': '1000.00'},
+        ]
+        for record in records:
+            with self.subTest(record=list(record)):
+                stream = io.StringIO(json.dumps({
+                    'title': 'Curry',
+                    'time_minutes': 5,
+                    'price': '1.00',
+                    **record,
+                }) + '\n')
+
+                with self.assertRaisesMessage(CommandError, 'line 1'):
+                    list(import_recipes.read_ndjson(stream))
+
+    def test_read_negative_time(self):
+        """Test a negative cooking time is rejected."""
+        stream = io.StringIO(
+            '{"title": "Curry", "time_minutes": -5, "price": "1.00"}\n'
+        )
+
+        with self.assertRaisesMessage(CommandError, 'line 1'):
+            list(import_recipes.read_ndjson(stream))
+
+    @skipIf(connection.vendor == 'postgresql', 'Runs without PostgreSQL.')
+    def test_import_requires_postgresql(self):
+        """Test the command refuses to run on other databases."""
+        path = self.write_file('.ndjson', '')
+
+        with self.assertRaisesMessage(CommandError, 'requires PostgreSQL'):
+            call_command('import_recipes', path, user=self.user.email)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_import_recipes(self):
+        """Test recipes, tags and links are imported."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        path = self.write_file('.ndjson', '\n'.join(
+            json.dumps({
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '2.50',
+                'tags': ['Dinner', f'Tag {i}'],
+            })
+            for i in range(3)
+        ))
+
+        call_command(
+            'import_recipes', path, user=self.user.email, stdout=io.StringIO()
+        )
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [recipe.title for recipe in recipes],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        for i, recipe in enumerate(recipes):
+            self.assertEqual(
+                sorted(tag.name for tag in recipe.tags.all()),
+                ['Dinner', f'Tag {i}']
+            )
+        self.assertEqual(
+            Tag.objects.get(user=self.user, name='Dinner').recipe_count, 3
+        )
+        self.assertEqual(
+            Tag.objects.get(user=self.user, name='Tag 0').recipe_count, 1
+        )
+        stats = RecipeStats.objects.get(user=self.user, time_bucket=0)
+        self.assertEqual(stats.recipe_count, 3)
+        self.assertEqual(stats.price_total, Decimal('7.50'))
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_import_unknown_user(self):
+        """Test importing for a missing user raises an error."""
+        path = self.write_file('.ndjson', '')
+
+        with self.assertRaisesMessage(
+            CommandError,
+            'User nobody@example.com does not exist.',
+        ):
+            call_command('import_recipes', path, user='nobody@example.com')
+
+
+class RecountTagsCommandTests(TestCase):
+    """Test the recount_tags command."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='password123',
+        )
+        self.tag = Tag.objects.create(user=user, name='Dinner')
+        recipe = Recipe.objects.create(
+            user=user,
+            title='Curry',
+            time_minutes=30,
+            price=Decimal('5.25'),
+        )
+        recipe.tags.add(self.tag)
+
+    def test_counts_up_to_date(self):
+        """Test nothing is reported when the counts match."""
+        out = io.StringIO()
+
+        call_command('recount_tags', check=True, stdout=out)
+
+        self.assertIn('up to date', out.getvalue())
+
+    def test_check_reports_drift(self):
+        """Test --check reports drift without fixing it."""
+        Tag.objects.update(recipe_count=5)
+        out = io.StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command('recount_tags', check=True, stdout=out)
+
+        self.assertIn('Dinner', out.getvalue())
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 5)
+
+    def test_fix_drift(self):
+        """Test drifted counts are recomputed."""
+        Tag.objects.update(recipe_count=5)
+
+        call_command('recount_tags', stdout=io.StringIO())
+
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 1)
+
+    def test_only_drifted_tags_fixed(self):
+        """Test tags with correct counts are neither reported nor updated."""
+        Tag.objects.create(user=self.tag.user, name='Lunch')
+        Tag.objects.filter(pk=self.tag.pk).update(recipe_count=5)
+        out = io.StringIO()
+
+        call_command('recount_tags', stdout=out)
+
+        self.assertNotIn('Lunch', out.getvalue())
+        self.assertIn('Fixed 1 tag recipe counts.', out.getvalue())
+
+
+class RebuildRecipeStatsCommandTests(TestCase):
+    """Test the rebuild_recipe_stats command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='password123',
+        )
+        for price in ['2.00', '4.00']:
+            Recipe.objects.create(
+                user=self.user,
+                title='Curry',
+                time_minutes=30,
+                price=Decimal(price),
+            )
+
+    def test_stats_up_to_date(self):
+        """Test nothing is reported when the stats match the recipes."""
+        out = io.StringIO()
+
+        call_command('rebuild_recipe_stats', check=True, stdout=out)
+
+        self.assertIn('up to date', out.getvalue())
+
+    def test_check_reports_drift(self):
+        """Test --check reports drift without fixing it."""
+        RecipeStats.objects.filter(recipe_count__gt=0).update(recipe_count=5)
+        out = io.StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_recipe_stats', check=True, stdout=out)
+
+        self.assertIn(f'User {self.user.id}, time bucket 2', out.getvalue())
+
+    def test_rebuild(self):
+        """Test the stats are rebuilt from the recipes."""
+        RecipeStats.objects.all().delete()
+
+        call_command('rebuild_recipe_stats', stdout=io.StringIO())
+
+        stats = RecipeStats.objects.get(user=self.user, time_bucket=2)
+        self.assertEqual(stats.recipe_count, 2)
+        self.assertEqual(stats.price_total, Decimal('6.00'))
+        self.assertEqual(stats.price_min, Decimal('2.00'))
+        self.assertEqual(stats.price_max, Decimal('4.00'))
+        self.assertEqual(RecipeStats.objects.filter(user=self.user).count(), 5)
+
+    def test_aggregates_rounded_to_cents(self):
+        """Test float noise in aggregated prices is not reported as drift."""
+        self.assertEqual(
+            rebuild_recipe_stats.to_cents(Decimal('7045.49999999999')),
+            Decimal('7045.50'),
+        )
+        self.assertIsNone(rebuild_recipe_stats.to_cents(None))
+        self.assertEqual(rebuild_recipe_stats.to_cents(3), 3)
+
+
+class SeedCommandTests(TestCase):
+    """Test the seed command."""
+
+    def seed(self, **options):
+        """Run the seed command with small defaults."""
+        options = {'users': 5, 'recipes': 8, 'tags': 4, **options}
+        call_command('seed', stdout=io.StringIO(), **options)
+
+    def dataset(self, domain):
+        """Return the seeded recipes and tag names per user email prefix."""
+        recipes = Recipe.objects.filter(
+            user__email__endswith=f'@{domain}',
+        ).order_by('user__email', 'id').prefetch_related('tags')
+
+        return [
+            (
+                recipe.user.email.split('@')[0],
+                recipe.title,
+                recipe.time_minutes,
+                recipe.price,
+                sorted(tag.name for tag in recipe.tags.all()),
+            )
+            for recipe in recipes.select_related('user')
+        ]
+
+    def test_seed(self):
+        """Test users, tags and recipes are created with their summaries."""
+        self.seed(recipe_distribution='fixed', batch_size=10)
+
+        users = get_user_model().objects.filter(
+            email__endswith='@seed.example.com',
+        )
+        self.assertEqual(users.count(), 5)
+        self.assertEqual(Recipe.objects.count(), 40)
+        self.assertTrue(users[0].check_password('password123'))
+        call_command('recount_tags', check=True, stdout=io.StringIO())
+        call_command(
+            'rebuild_recipe_stats', check=True, stdout=io.StringIO(),
+        )
+        self.assertEqual(RecipeStats.objects.count(), 5 * 5)
+
+    def test_user_split_across_batches(self):
+        """Test a user with more rows than a batch is written in parts."""
+        out = io.StringIO()
+
+        call_command(
+            'seed', users=1, recipes=30, recipe_distribution='fixed',
+            tags=3, tag_distribution='fixed', batch_size=10, stdout=out,
+        )
+
+        self.assertGreater(out.getvalue().count('Wrote'), 2)
+        self.assertEqual(Recipe.objects.count(), 30)
+        call_command('recount_tags', check=True, stdout=io.StringIO())
+        call_command(
+            'rebuild_recipe_stats', check=True, stdout=io.StringIO(),
+        )
+
+    def test_reproducible(self):
+        """Test the same seed generates the same data."""
+        self.seed(seed=7, email_domain='a.example.com', batch_size=5)
+        self.seed(seed=7, email_domain='b.example.com')
+        self.seed(seed=8, email_domain='c.example.com')
+
+        first = self.dataset('a.example.com')
+        self.assertEqual(first, self.dataset('b.example.com'))
+        self.assertNotEqual(first, self.dataset('c.example.com'))
+
+    def test_existing_users(self):
+        """Test seeding users of an existing email domain fails."""
+        self.seed(users=1)
+
+        with self.assertRaises(CommandError):
+            self.seed(users=1)
+
+    def test_allocate_zipf(self):
+        """Test the Zipf distribution gives most rows to a few users."""
+        counts = seed.allocate(random.Random(0), 100, 50, 'zipf', 1.1)
+
+        self.assertAlmostEqual(sum(counts), 5000, delta=50)
+        self.assertGreater(sum(sorted(counts)[-10:]), sum(counts) / 2)
+
+    def test_allocate_fixed(self):
+        """Test the fixed distribution gives every user the mean."""
+        counts = seed.allocate(random.Random(0), 3, 4, 'fixed', 1.1)
+
+        self.assertEqual(counts, [4, 4, 4])
@@ -0,0 +1,169 @@
+"""
+Tests for the pooled PostgreSQL database backend.
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase
+
+try:
+    from core.backends.postgresql.base import DatabaseWrapper, pool_stats
+except ImportError:  # pragma: no cover
+    DatabaseWrapper = None
+
+
+def make_wrapper(alias='pool-test', **options):
+    """Create an unconnected database wrapper with the given settings."""
+    settings_dict = {
+        'ENGINE': 'core.backends.postgresql',
+        'NAME': 'recipe_test',
+        'USER': 'user',
+        'PASSWORD': 'password',
+        'HOST': 'localhost',
+        'PORT': '5432',
+        'ATOMIC_REQUESTS': False,
+        'AUTOCOMMIT': True,
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'OPTIONS': {},
+        'TIME_ZONE': None,
+        'TEST': {},
+    }
+    settings_dict.update(options)
+
+    return DatabaseWrapper(settings_dict, alias=alias)
+
+
+@unittest.skipIf(DatabaseWrapper is None, 'psycopg is not installed.')
+@patch('psycopg_pool.ConnectionPool')
+class PoolConfigurationTests(SimpleTestCase):
+    """Test how the backend sets up its connection pool."""
+
+    def tearDown(self):
+        DatabaseWrapper._connection_pools.pop(
+            ('pool-test', 'recipe_test'), None
+        )
+
+    def test_no_pool_without_option(self, mock_pool):
+        """Test pooling is disabled unless configured."""
+        wrapper = make_wrapper()
+
+        self.assertIsNone(wrapper.pool)
+        mock_pool.assert_not_called()
+
+    def test_pool_created_with_options(self, mock_pool):
+        """Test the pool gets the connection and pool settings."""
+        wrapper = make_wrapper(OPTIONS={'pool': {
+            'min_size': 2,
+            'max_size': 4,
+            'timeout': 5,
+            'stats_interval': 10,
+        }})
+
+        self.assertIs(wrapper.pool, mock_pool.return_value)
+        self.assertIs(wrapper.pool, mock_pool.return_value)
+
+        mock_pool.assert_called_once()
+        kwargs = mock_pool.call_args.kwargs
+        self.assertEqual(kwargs['min_size'], 2)
+        self.assertEqual(kwargs['max_size'], 4)
+        self.assertEqual(kwargs['timeout'], 5)
+        self.assertNotIn('stats_interval', kwargs)
+        self.assertIsNone(kwargs['check'])
+        self.assertEqual(kwargs['kwargs']['dbname'], 'recipe_test')
+        self.assertTrue(kwargs['kwargs']['autocommit'])
+        self.assertNotIn('pool', kwargs['kwargs'])
+        mock_pool.return_value.open.assert_called_once()
+
+    def test_health_checks_enabled(self, mock_pool):
+        """Test CONN_HEALTH_CHECKS makes the pool check connections."""
+        wrapper = make_wrapper(
+            CONN_HEALTH_CHECKS=True,
+            OPTIONS={'pool': True},
+        )
+        wrapper.pool
+
+        self.assertIs(
+            mock_pool.call_args.kwargs['check'],
+            mock_pool.check_connection,
+        )
+
+    def test_persistent_connections_rejected(self, mock_pool):
+        """Test pooling cannot be combined with CONN_MAX_AGE."""
+        wrapper = make_wrapper(CONN_MAX_AGE=60, OPTIONS={'pool': True})
+
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.pool
+
+    def test_connections_borrowed_and_returned(self, mock_pool):
+        """Test connecting and closing use the pool."""
+        wrapper = make_wrapper(OPTIONS={'pool': True})
+        pool = mock_pool.return_value
+        conn = MagicMock()
+        pool.getconn.return_value = conn
+
+        self.assertIs(wrapper.get_new_connection({}), conn)
+        wrapper.connection = conn
+        wrapper._close()
+
+        pool.getconn.assert_called_once()
+        pool.putconn.assert_called_once_with(conn)
+        self.assertIsNone(wrapper.connection)
+        conn.close.assert_not_called()
+
+    def test_close_pool(self, mock_pool):
+        """Test closing the pool forgets it."""
+        wrapper = make_wrapper(OPTIONS={'pool': True})
+        pool = wrapper.pool
+
+        wrapper.close_pool()
+
+        pool.close.assert_called_once()
+        self.assertNotIn(wrapper.pool_key, DatabaseWrapper._connection_pools)
+
+    def test_pool_stats_reads_open_pools(self, mock_pool):
+        """Test stats are read from open pools without creating any."""
+        wrapper = make_wrapper(OPTIONS={'pool': True})
+        before = dict(DatabaseWrapper._connection_pools)
+
+        self.assertNotIn('pool-test', pool_stats())
+        self.assertEqual(DatabaseWrapper._connection_pools, before)
+        mock_pool.assert_not_called()
+
+        wrapper.pool
+        mock_pool.return_value.get_stats.return_value = {'pool_size': 1}
+
+        self.assertEqual(pool_stats()['pool-test'], {'pool_size': 1})
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql', 'Pooling requires PostgreSQL.'
+)
+class PooledConnectionTests(SimpleTestCase):
+    """Test queries through a real connection pool."""
+    databases = ['default']
+
+    def test_queries_reuse_pooled_connection(self):
+        """Test a closed connection goes back to the pool for reuse."""
+        wrapper = make_wrapper(**{
+            **connection.settings_dict,
+            'ENGINE': 'core.backends.postgresql',
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'pool': {'min_size': 1, 'max_size': 1}},
+        })
+        self.addCleanup(wrapper.close_pool)
+
+        backend_pids = set()
+        for _ in range(3):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT pg_backend_pid()')
+                backend_pids.add(cursor.fetchone()[0])
+            wrapper.close()
+
+        stats = wrapper.pool.get_stats()
+        self.assertEqual(len(backend_pids), 1)
+        self.assertEqual(stats['pool_size'], 1)
+        self.assertEqual(stats['requests_num'], 3)
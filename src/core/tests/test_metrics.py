@@ -0,0 +1,247 @@
+"""
+Tests for the request metrics.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Tag
+
+METRICS_URL = reverse('metrics')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def dead_pid():
+    """Return the id of a process that has exited."""
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+
+    return process.pid
+
+
+@override_settings(METRICS_DIR='', METRICS_TOKEN='', METRICS_PUBLIC=False)
+class MetricsMiddlewareTests(TestCase):
+    """Test recording request metrics."""
+
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='password123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(RECIPE_CACHE_ALIAS='default')
+    def test_request_recorded(self):
+        """Test latency, queries, size and status are recorded per route."""
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+        self.client.post(TAGS_URL)
+
+        route = metrics.registry.routes['recipe:tag-list']
+        get = route['GET']
+        self.assertEqual(sum(get.latency), 2)
+        self.assertEqual(get.queries_sum, 1)
+        self.assertEqual(sum(get.queries), 2)
+        self.assertGreater(get.query_seconds, 0)
+        self.assertEqual(get.size_sum, 2 * len(res.content))
+        self.assertEqual(get.statuses, {200: 2})
+        self.assertEqual(
+            route['POST'].statuses,
+            {status.HTTP_405_METHOD_NOT_ALLOWED: 1},
+        )
+        self.assertEqual(
+            metrics.registry.cache_requests['recipe_response'],
+            {'miss': 1, 'hit': 1},
+        )
+
+    async def test_async_view_queries_recorded(self):
+        """Test queries of async views, run in other threads, are counted."""
+        token = await Token.objects.acreate(user=self.user)
+
+        await AsyncClient().get(
+            reverse('recipe:async-tag-list'),
+            headers={'Authorization': f'Token {token.key}'},
+        )
+
+        route = metrics.registry.routes['recipe:async-tag-list']['GET']
+        self.assertEqual(route.statuses, {200: 1})
+        self.assertGreater(route.queries_sum, 0)
+
+    def test_unmatched_route(self):
+        """Test requests for unknown paths share one route label."""
+        self.client.get('/missing/')
+
+        self.assertEqual(
+            metrics.registry.routes['unmatched']['GET'].statuses,
+            {404: 1},
+        )
+
+    def test_metrics_denied_by_default(self):
+        """Test the metrics are not served without a token."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_PUBLIC=True)
+    def test_metrics_endpoint(self):
+        """Test the metrics are served in the Prometheus format."""
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], metrics.CONTENT_TYPE)
+        content = res.content.decode()
+        self.assertIn(
+            '# TYPE http_request_duration_seconds histogram',
+            content,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count'
+            '{route="recipe:tag-list",method="GET"} 1',
+            content,
+        )
+        self.assertIn(
+            'http_request_queries_bucket'
+            '{route="recipe:tag-list",method="GET",le="+Inf"} 1',
+            content,
+        )
+        self.assertIn(
+            'http_responses_total'
+            '{route="recipe:tag-list",method="GET",status="200"} 1',
+            content,
+        )
+        self.assertIn(
+            'api_cache_requests_total'
+            '{cache="recipe_response",result="miss"} 1',
+            content,
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """Test a configured token is required to read the metrics."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.client.get(
+            METRICS_URL,
+            HTTP_AUTHORIZATION='Bearer secret',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class RenderTests(SimpleTestCase):
+    """Test rendering metrics."""
+
+    def test_histogram_cumulative(self):
+        """Test histogram buckets are rendered cumulatively."""
+        lines = list(metrics.histogram_lines(
+            'latency', {'route': 'a'}, [0.1, 1.0], [2, 0, 1], 1.5,
+        ))
+
+        self.assertEqual(lines, [
+            'latency_bucket{route="a",le="0.1"} 2',
+            'latency_bucket{route="a",le="1.0"} 2',
+            'latency_bucket{route="a",le="+Inf"} 3',
+            'latency_sum{route="a"} 1.5',
+            'latency_count{route="a"} 3',
+        ])
+
+    def test_label_escaping(self):
+        """Test label values are escaped."""
+        self.assertEqual(
+            metrics.format_labels({'route': 'a"b\\c'}),
+            '{route="a\\"b\\\\c"}',
+        )
+
+
+class MultiprocessTests(SimpleTestCase):
+    """Test adding up the metrics of several processes."""
+
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_snapshot(self, pid, snapshot):
+        """Write the snapshot of another process."""
+        path = os.path.join(self.directory, f'{pid}.json')
+        with open(path, 'w') as stream:
+            json.dump(snapshot, stream)
+
+    def test_collect(self):
+        """Test snapshots of all processes are added up."""
+        queries = metrics.RequestQueries()
+        metrics.registry.observe('home', 'GET', 0.2, queries, 10, 200)
+        other = metrics.RouteMetrics()
+        other.observe(0.2, queries, 10, 200)
+        other.observe(3.0, queries, 10, 500)
+        self.write_snapshot(dead_pid(), {
+            'routes': {'home': {'GET': other.snapshot()}},
+            'cache_requests': {'token': {'hit': 5, 'miss': 1}},
+            'pools': {'dead-alias': {'pool_size': 4}},
+        })
+
+        with override_settings(METRICS_DIR=self.directory):
+            total = metrics.collect()
+
+        home = total['routes']['home']['GET']
+        self.assertEqual(sum(home['latency']), 3)
+        self.assertEqual(home['statuses'], {'200': 2, '500': 1})
+        self.assertGreaterEqual(total['cache_requests']['token']['hit'], 5)
+        self.assertNotIn('dead-alias', total['pools'])
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, f'{os.getpid()}.json')
+        ))
+
+    def test_flushed_in_background(self):
+        """Test requests start the flush thread instead of writing."""
+        registry = metrics.Registry()
+        queries = metrics.RequestQueries()
+
+        with override_settings(METRICS_DIR=self.directory,
+                               METRICS_FLUSH_INTERVAL=3600), \
+                patch.object(registry, 'flush') as flush, \
+                patch('threading.Thread.start') as start:
+            registry.observe('home', 'GET', 0.2, queries, 10, 200)
+            registry.observe('home', 'GET', 0.2, queries, 10, 200)
+
+        flush.assert_not_called()
+        start.assert_called_once()
+        self.assertEqual(registry._flusher_pid, os.getpid())
+
+    def test_merge(self):
+        """Test numbers, lists and nested dicts are added up."""
+        total = metrics.merge({}, {'a': 1, 'b': [1, 2], 'c': {'d': 1.5}})
+        metrics.merge(total, {'a': 2, 'b': [1, 1], 'c': {'d': 1.0, 'e': 1}})
+
+        self.assertEqual(
+            total,
+            {'a': 3, 'b': [2, 3], 'c': {'d': 2.5, 'e': 1}},
+        )
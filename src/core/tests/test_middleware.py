@@ -0,0 +1,148 @@
+"""
+Tests for the compression middleware.
+"""
+import asyncio
+import gzip
+from unittest.mock import MagicMock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import (
+    Codec,
+    CompressionMiddleware,
+    GzipCompressor,
+    negotiate,
+    parse_accept_encoding,
+)
+
+CONTENT = b'{"title": "Sample recipe"}' * 100
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compression-tests',
+    }
+}
+
+
+def make_codec(name):
+    """Return a gzip based codec registered under another name."""
+    return Codec(name, gzip.compress, GzipCompressor)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=512, CACHES=LOCMEM_CACHES)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compressing responses."""
+
+    def process(self, response, accept_encoding='gzip'):
+        """Run a response through the middleware."""
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        middleware = CompressionMiddleware(lambda request: response)
+
+        return middleware(request)
+
+    def test_gzip_response(self):
+        """Test large responses are gzipped for clients accepting it."""
+        response = HttpResponse(CONTENT)
+        response['ETag'] = '"abc"'
+
+        response = self.process(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), CONTENT)
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_small_response_not_compressed(self):
+        """Test bodies below the size threshold are sent as is."""
+        response = self.process(HttpResponse(CONTENT[:511]))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, CONTENT[:511])
+
+    def test_encoding_not_accepted(self):
+        """Test responses are not compressed without a matching coding."""
+        for accept_encoding in ['', 'identity', 'gzip;q=0', 'compress']:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.process(HttpResponse(CONTENT), accept_encoding)
+
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_streaming_response(self):
+        """Test streaming responses are compressed chunk by chunk."""
+        chunks = [CONTENT[i:i + 100] for i in range(0, len(CONTENT), 100)]
+        response = self.process(StreamingHttpResponse(iter(chunks)))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            CONTENT,
+        )
+
+    def test_async_streaming_response(self):
+        """Test async streaming responses are compressed."""
+        async def chunks():
+            yield CONTENT[:1000]
+            yield CONTENT[1000:]
+
+        response = self.process(StreamingHttpResponse(chunks()))
+
+        async def read():
+            return b''.join([
+                chunk async for chunk in response.streaming_content
+            ])
+
+        self.assertEqual(gzip.decompress(asyncio.run(read())), CONTENT)
+
+    def test_cached_compressed_content(self):
+        """Test flagged responses reuse compressed bytes from the cache."""
+        codec = make_codec('gzip')
+        codec.compress = MagicMock(side_effect=gzip.compress)
+        middleware = CompressionMiddleware(lambda request: None)
+        middleware.codecs = [codec]
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        for _ in range(3):
+            response = HttpResponse(CONTENT)
+            response.cache_compressed = True
+            response = middleware.process_response(request, response)
+
+            self.assertEqual(gzip.decompress(response.content), CONTENT)
+
+        codec.compress.assert_called_once_with(CONTENT)
+
+
+class NegotiationTests(SimpleTestCase):
+    """Test choosing a content coding."""
+
+    def test_parse_accept_encoding(self):
+        """Test codings and quality values are parsed."""
+        self.assertEqual(
+            parse_accept_encoding('gzip, br;q=0.5, *;q=0 , zstd;q=x'),
+            {'gzip': 1.0, 'br': 0.5, '*': 0.0, 'zstd': 0.0},
+        )
+
+    def test_negotiate(self):
+        """Test the server preference breaks ties between codings."""
+        codecs = [make_codec('br'), make_codec('zstd'), make_codec('gzip')]
+        cases = [
+            ('gzip, br', 'br'),
+            ('gzip, zstd', 'zstd'),
+            ('gzip;q=1, br;q=0.5', 'gzip'),
+            ('*', 'br'),
+            ('br;q=0, *', 'zstd'),
+            ('deflate', None),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                codec = negotiate(header, codecs)
+
+                self.assertEqual(codec and codec.name, expected)
@@ -3,6 +3,7 @@ Tests for Models
 """
 from decimal import Decimal
 
+from django.db import IntegrityError, connection
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -84,3 +85,233 @@ class ModelTests(TestCase):
         tag = models.Tag.objects.create(user=user, name='Tag1')
 
         self.assertEqual(str(tag), tag.name)
+
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='Tag1')
+        models.Tag.objects.create(user=other_user, name='Tag1')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Tag1')
+
+
+class TagRecipeCountTests(TestCase):
+    """Test maintaining the recipe count of tags."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.tags = [
+            models.Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dessert', 'Dinner']
+        ]
+        self.recipe = self.create_recipe()
+
+    def create_recipe(self, title='Sample recipe'):
+        """Create and return a recipe of the test user."""
+        return models.Recipe.objects.create(
+            user=self.user,
+            title=title,
+            time_minutes=5,
+            price=Decimal('5.50'),
+        )
+
+    def assertCounts(self, expected):
+        """Assert the stored recipe counts of the test tags."""
+        counts = dict(
+            models.Tag.objects.values_list('name', 'recipe_count')
+        )
+        self.assertEqual(
+            [counts[tag.name] for tag in self.tags],
+            expected,
+        )
+
+    def test_add_and_remove_tags(self):
+        """Test linking and unlinking tags updates their counts."""
+        other = self.create_recipe('Other')
+        self.recipe.tags.add(*self.tags[:2])
+        other.tags.add(self.tags[0])
+        self.recipe.tags.add(self.tags[0])
+        self.assertCounts([2, 1, 0])
+
+        self.recipe.tags.remove(self.tags[0], self.tags[2])
+        self.assertCounts([1, 1, 0])
+
+        self.recipe.tags.set([self.tags[2]])
+        self.assertCounts([1, 0, 1])
+
+        other.tags.clear()
+        self.assertCounts([0, 0, 1])
+
+    def test_reverse_add_and_remove(self):
+        """Test changing the recipes of a tag updates its count."""
+        recipes = [self.recipe, self.create_recipe('Other')]
+        tag = self.tags[0]
+
+        tag.recipe_set.add(*recipes)
+        tag.recipe_set.add(self.recipe)
+        self.assertCounts([2, 0, 0])
+
+        tag.recipe_set.remove(self.recipe)
+        self.assertCounts([1, 0, 0])
+
+        tag.recipe_set.clear()
+        self.assertCounts([0, 0, 0])
+
+    def test_delete_recipe(self):
+        """Test deleting a recipe decrements the counts of its tags."""
+        self.recipe.tags.add(*self.tags[:2])
+        self.create_recipe('Other').tags.add(self.tags[0])
+
+        self.recipe.delete()
+
+        self.assertCounts([1, 0, 0])
+
+    def test_adjust_recipe_counts(self):
+        """Test counts are adjusted with one update per distinct delta."""
+        deltas = {
+            self.tags[0].id: 2,
+            self.tags[1].id: 2,
+            self.tags[2].id: 0,
+        }
+
+        with self.assertNumQueries(1):
+            models.Tag.objects.adjust_recipe_counts(deltas)
+
+        self.assertCounts([2, 2, 0])
+
+
+class RecipeStatsTests(TestCase):
+    """Test maintaining the recipe stats summary."""
+
+    def setUp(self):
+        self.user = create_user()
+
+    def create_recipe(self, time_minutes, price):
+        """Create and return a recipe of the test user."""
+        return models.Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=time_minutes,
+            price=Decimal(price),
+        )
+
+    def assertStats(self, expected):
+        """Assert the non-empty stats rows of the test user."""
+        rows = models.RecipeStats.objects.filter(
+            user=self.user,
+            recipe_count__gt=0,
+        ).order_by('time_bucket').values_list(
+            'time_bucket', 'recipe_count', 'price_total', 'price_min',
+            'price_max',
+        )
+        self.assertEqual(
+            list(rows),
+            [
+                (bucket, count, Decimal(total), Decimal(low), Decimal(high))
+                for bucket, count, total, low, high in expected
+            ],
+        )
+
+    def test_time_bucket(self):
+        """Test cooking times are put in the right bucket."""
+        cases = [(0, 0), (14, 0), (15, 1), (59, 2), (60, 3), (500, 4)]
+        for minutes, bucket in cases:
+            with self.subTest(minutes=minutes):
+                self.assertEqual(models.time_bucket(minutes), bucket)
+
+        self.assertEqual(models.time_bucket_bounds(0), (0, 14))
+        self.assertEqual(models.time_bucket_bounds(4), (120, None))
+
+    def test_empty_rows_created_for_user(self):
+        """Test new users start with an empty row per time bucket."""
+        rows = models.RecipeStats.objects.filter(user=self.user)
+
+        self.assertEqual(rows.count(), len(models.TIME_BUCKETS) + 1)
+        self.assertFalse(rows.filter(recipe_count__gt=0).exists())
+
+    def test_create_recipes(self):
+        """Test new recipes are added to their bucket."""
+        self.create_recipe(10, '2.00')
+        self.create_recipe(12, '4.50')
+        self.create_recipe(90, '9.99')
+
+        self.assertStats([
+            (0, 2, '6.50', '2.00', '4.50'),
+            (3, 1, '9.99', '9.99', '9.99'),
+        ])
+
+    def test_update_recipe(self):
+        """Test changed recipes move between buckets and extremes."""
+        recipe = self.create_recipe(10, '2.00')
+        self.create_recipe(12, '4.50')
+
+        recipe.price = Decimal('3.00')
+        recipe.save()
+        self.assertStats([(0, 2, '7.50', '3.00', '4.50')])
+
+        recipe.time_minutes = 45
+        recipe.save()
+        self.assertStats([
+            (0, 1, '4.50', '4.50', '4.50'),
+            (2, 1, '3.00', '3.00', '3.00'),
+        ])
+
+        recipe.title = 'Renamed'
+        with self.assertNumQueries(1):
+            recipe.save(update_fields=['title'])
+
+    def test_delete_recipe(self):
+        """Test deleted recipes are taken off the stats."""
+        cheap = self.create_recipe(10, '2.00')
+        self.create_recipe(12, '4.50')
+        self.create_recipe(14, '3.00')
+
+        cheap.delete()
+
+        self.assertStats([(0, 2, '7.50', '3.00', '4.50')])
+
+
+class QueryPlanTests(TestCase):
+    """Test the viewset queries are served by indexes."""
+
+    def setUp(self):
+        self.user = create_user()
+        for i in range(20):
+            models.Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=5,
+                price=Decimal('5.50'),
+            )
+            models.Tag.objects.create(user=self.user, name=f'Tag {i}')
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertIndexedWithoutSort(self, queryset, index_name):
+        """Assert the plan reads the index and needs no separate sort."""
+        plan = queryset.explain()
+
+        if connection.vendor == 'postgresql':
+            self.assertIn(index_name, plan)
+            self.assertNotIn('Sort', plan)
+        else:
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_recipe_list_uses_user_id_index(self):
+        """Test recipes of a user are read newest first from an index."""
+        queryset = models.Recipe.objects.filter(
+            user=self.user
+        ).order_by('-id')
+
+        self.assertIndexedWithoutSort(queryset, 'recipe_user_id_desc_idx')
+
+    def test_tag_list_uses_unique_name_index(self):
+        """Test tags of a user are read in name order from an index."""
+        queryset = models.Tag.objects.filter(
+            user=self.user
+        ).order_by('-name')
+
+        self.assertIndexedWithoutSort(queryset, 'unique_tag_name_per_user')
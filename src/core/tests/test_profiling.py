@@ -0,0 +1,155 @@
+"""
+Tests for the SQL profiler.
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import profiling
+from core.models import Recipe, Tag
+
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class FingerprintTests(SimpleTestCase):
+    """Test normalizing SQL statements."""
+
+    def test_literals_normalized(self):
+        """Test parameters and literals are replaced by placeholders."""
+        self.assertEqual(
+            profiling.fingerprint(
+                "SELECT  *\n FROM t WHERE a = 'it''s' AND b = -1.5 "
+                'AND c = %s LIMIT 21'
+            ),
+            'SELECT * FROM t WHERE a = ? AND b = ? AND c = ? LIMIT ?',
+        )
+
+    def test_lists_collapsed(self):
+        """Test IN lists and multi-row VALUES share one fingerprint."""
+        self.assertEqual(
+            profiling.fingerprint('SELECT * FROM t WHERE id IN (1, 2, 3)'),
+            profiling.fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+        self.assertEqual(
+            profiling.fingerprint(
+                'INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'
+            ),
+            'INSERT INTO t (a, b) VALUES (...)',
+        )
+
+    def test_identifiers_kept(self):
+        """Test digits inside identifiers are not replaced."""
+        self.assertEqual(
+            profiling.fingerprint('SELECT "t1"."col2" FROM "t1" U0'),
+            'SELECT "t1"."col2" FROM "t1" U0',
+        )
+
+
+class ProfileTests(TestCase):
+    """Test recording statements."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='password123',
+        )
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        for i in range(3):
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=Decimal('2.50'),
+            ).tags.add(tag)
+
+    def test_n_plus_one_detected(self):
+        """Test a query per recipe is reported as repeated."""
+        with profiling.profile() as profile:
+            for recipe in Recipe.objects.all():
+                list(recipe.tags.all())
+
+        self.assertEqual(profile.query_count, 4)
+        repeated = profile.repeated(3)
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0]['count'], 3)
+        self.assertIn('"core_recipe_tags"', repeated[0]['fingerprint'])
+
+    def test_prefetch_not_repeated(self):
+        """Test prefetching the tags avoids the repeated queries."""
+        with profiling.profile() as profile:
+            for recipe in Recipe.objects.prefetch_related('tags'):
+                list(recipe.tags.all())
+
+        self.assertEqual(profile.query_count, 2)
+        self.assertEqual(profile.repeated(2), [])
+
+    def test_savepoints_not_repeated(self):
+        """Test transaction statements are not reported as repeated."""
+        profile = profiling.Profile()
+        for i in range(5):
+            profile.record(f'SAVEPOINT "s{i}"', 0.001)
+
+        self.assertEqual(profile.repeated(2), [])
+
+
+@override_settings(
+    SQL_PROFILING_SAMPLE_RATE=1.0,
+    SQL_PROFILING_LATENCY_BUDGET=60,
+    SQL_PROFILING_QUERY_BUDGET=20,
+    SQL_PROFILING_REPEAT_LIMIT=5,
+    SQL_PROFILING_STRICT=False,
+)
+class SQLProfilingMiddlewareTests(TestCase):
+    """Test profiling requests."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='password123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def test_within_budget_not_logged(self):
+        """Test requests within budget are not reported."""
+        with self.assertNoLogs('core.profiling'):
+            self.client.get(TAGS_URL)
+
+    @override_settings(SQL_PROFILING_QUERY_BUDGET=0)
+    def test_over_budget_logged(self):
+        """Test requests over the query budget are logged as JSON."""
+        with self.assertLogs('core.profiling', 'WARNING') as logs:
+            self.client.get(TAGS_URL)
+
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(data['event'], 'sql_profile')
+        self.assertEqual(data['route'], 'recipe:tag-list')
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['violations'], ['queries'])
+        self.assertEqual(data['query_count'], 1)
+        self.assertIn('"core_tag"', data['slowest'][0]['fingerprint'])
+
+    @override_settings(
+        SQL_PROFILING_QUERY_BUDGET=0,
+        SQL_PROFILING_SAMPLE_RATE=0.0,
+    )
+    def test_not_sampled(self):
+        """Test requests outside the sample are not profiled."""
+        with self.assertNoLogs('core.profiling'):
+            self.client.get(TAGS_URL)
+
+    @override_settings(
+        SQL_PROFILING_LATENCY_BUDGET=0,
+        SQL_PROFILING_SAMPLE_RATE=0.0,
+        SQL_PROFILING_STRICT=True,
+    )
+    def test_strict_fails_request(self):
+        """Test strict mode fails requests over budget."""
+        with self.assertLogs('core.profiling', 'WARNING'), \
+                self.assertRaises(profiling.BudgetExceeded):
+            self.client.get(TAGS_URL)
@@ -0,0 +1,44 @@
+"""
+Tests for timing SQL queries.
+"""
+from django.db import connection
+from django.test import TestCase
+
+from core import metrics, profiling, queries
+from core.models import Tag
+
+
+class ObserveQueriesTests(TestCase):
+    """Test passing queries to the observers of the current context."""
+
+    def test_nested_observers(self):
+        """Test every observer of the context sees its queries."""
+        outer = metrics.RequestQueries()
+
+        with queries.observe_queries(outer.record):
+            Tag.objects.count()
+            with profiling.profile() as profile:
+                Tag.objects.count()
+
+        self.assertEqual(outer.count, 2)
+        self.assertEqual(profile.query_count, 1)
+
+    def test_no_observer(self):
+        """Test queries outside a block are not passed on."""
+        recorded = []
+        with queries.observe_queries(lambda *args: recorded.append(args)):
+            pass
+
+        Tag.objects.count()
+
+        self.assertEqual(recorded, [])
+
+    def test_installed_once(self):
+        """Test the connection gets a single query timer."""
+        with queries.observe_queries(metrics.RequestQueries().record):
+            with profiling.profile():
+                pass
+
+        self.assertEqual(
+            connection.execute_wrappers.count(queries.time_query), 1
+        )
@@ -0,0 +1,120 @@
+"""
+Tests for the JSON renderer and parser.
+"""
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from core import renderers
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+SAMPLE = {
+    'price': Decimal('5.50'),
+    'created': datetime.datetime(
+        2023, 7, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+    ),
+    'naive': datetime.datetime(2023, 7, 1, 12, 30),
+    'date': datetime.date(2023, 7, 1),
+    'time': datetime.time(8, 15, 30, 500),
+    'duration': datetime.timedelta(minutes=90),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'lazy': gettext_lazy('Not found.'),
+    'text': 'Crème brûlée \u2028 "quoted" \u2029',
+    'nested': ReturnDict({'ids': (1, 2, 3), 'none': None}, serializer=None),
+    1: 'integer key',
+    'float': 1.5,
+}
+
+
+@skipIf(renderers.orjson is None, 'orjson is not installed.')
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the orjson backed renderer."""
+
+    def test_output_matches_json_renderer(self):
+        """Test rendering is byte identical to the DRF renderer."""
+        for data in [SAMPLE, [SAMPLE, SAMPLE], [], {}, 'text', 1, None]:
+            with self.subTest(data=data):
+                self.assertEqual(
+                    FastJSONRenderer().render(data),
+                    JSONRenderer().render(data),
+                )
+
+    def test_unsupported_values_fall_back(self):
+        """Test values orjson cannot encode are rendered by the stdlib."""
+        data = {'big': 2 ** 70}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data),
+        )
+
+    def test_uses_orjson(self):
+        """Test compact output is rendered by orjson."""
+        with patch.object(renderers.orjson, 'dumps', return_value=b'{}') \
+                as dumps:
+            FastJSONRenderer().render({'a': 1})
+
+        dumps.assert_called_once()
+
+    def test_indent_falls_back(self):
+        """Test indented output is rendered like the DRF renderer."""
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, media_type),
+            JSONRenderer().render(SAMPLE, media_type),
+        )
+
+    def test_without_orjson(self):
+        """Test the stdlib is used when orjson is not installed."""
+        with patch.object(renderers, 'orjson', None):
+            self.assertEqual(
+                FastJSONRenderer().render(SAMPLE),
+                JSONRenderer().render(SAMPLE),
+            )
+
+
+@skipIf(renderers.orjson is None, 'orjson is not installed.')
+class FastJSONParserTests(SimpleTestCase):
+    """Test the orjson backed parser."""
+
+    def parse(self, content, parser=None, **context):
+        parser = parser or FastJSONParser()
+        return parser.parse(io.BytesIO(content), parser_context=context)
+
+    def test_parse_matches_json_parser(self):
+        """Test parsing returns what the DRF parser returns."""
+        content = '{"title": "Crème", "price": 5.5, "tags": [{"id": 1}]}'
+
+        self.assertEqual(
+            self.parse(content.encode()),
+            self.parse(content.encode(), JSONParser()),
+        )
+
+    def test_invalid_json(self):
+        """Test malformed JSON raises a parse error."""
+        for content in [b'{"title": ', b'{"price": NaN}', b'\xff']:
+            with self.subTest(content=content):
+                with self.assertRaises(ParseError):
+                    self.parse(content)
+
+    def test_other_encoding_falls_back(self):
+        """Test non UTF-8 bodies are parsed by the stdlib."""
+        content = '{"title": "Crème"}'.encode('latin-1')
+
+        self.assertEqual(
+            self.parse(content, encoding='latin-1'),
+            {'title': 'Crème'},
+        )
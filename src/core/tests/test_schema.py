@@ -0,0 +1,146 @@
+"""
+Tests for the prebuilt OpenAPI schema.
+"""
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+@override_settings(APP_VERSION='1.0.0', SCHEMA_FILE='')
+class CachedSchemaViewTests(SimpleTestCase):
+    """Test serving the cached schema."""
+
+    def setUp(self):
+        schema.clear_schema()
+        self.addCleanup(schema.clear_schema)
+
+    def test_schema_generated_once(self):
+        """Test the schema is generated once and served from memory."""
+        with patch.object(schema, 'generate_schema',
+                          wraps=schema.generate_schema) as generate:
+            first = self.client.get(SCHEMA_URL)
+            second = self.client.get(SCHEMA_URL)
+
+        generate.assert_called_once()
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertIn(b'openapi:', first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match is answered with 304."""
+        res = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_json_format(self):
+        """Test the JSON rendering is cached separately."""
+        yaml_res = self.client.get(SCHEMA_URL)
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(
+            res['Content-Type'],
+            'application/vnd.oai.openapi+json',
+        )
+        self.assertIn('/api/recipe/recipes/', json.loads(res.content)['paths'])
+        self.assertNotEqual(res['ETag'], yaml_res['ETag'])
+
+    def test_regenerated_on_new_version(self):
+        """Test a new code version invalidates the cached schema."""
+        first = self.client.get(SCHEMA_URL)
+
+        with override_settings(APP_VERSION='1.0.1'), \
+                patch.object(schema, 'generate_schema',
+                             wraps=schema.generate_schema) as generate:
+            second = self.client.get(SCHEMA_URL)
+
+        generate.assert_called_once()
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+
+@override_settings(APP_VERSION='1.0.0')
+class BuildSchemaCommandTests(SimpleTestCase):
+    """Test prebuilding the schema to a file."""
+
+    def setUp(self):
+        schema.clear_schema()
+        self.addCleanup(schema.clear_schema)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'schema.json')
+
+    def test_schema_served_from_file(self):
+        """Test the view serves a schema written by the command."""
+        call_command('build_schema', self.path, stdout=io.StringIO())
+
+        with override_settings(SCHEMA_FILE=self.path), \
+                patch.object(schema, 'generate_schema') as generate:
+            res = self.client.get(SCHEMA_URL)
+
+        generate.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(b'/api/recipe/recipes/', res.content)
+
+    def test_stale_file_ignored(self):
+        """Test a schema file of another code version is regenerated."""
+        schema.write_schema(self.path, '0.9.0', {'openapi': '3.0.3'})
+
+        with override_settings(SCHEMA_FILE=self.path):
+            res = self.client.get(SCHEMA_URL)
+
+        self.assertIn(b'/api/recipe/recipes/', res.content)
+
+    def test_path_required(self):
+        """Test the command needs a path or SCHEMA_FILE."""
+        with override_settings(SCHEMA_FILE=''), \
+                self.assertRaises(CommandError):
+            call_command('build_schema')
+
+
+@override_settings(APP_VERSION='')
+class CodeVersionTests(SimpleTestCase):
+    """Test the code version derived from the sources."""
+
+    def test_version_computed_once(self):
+        """Test requests do not walk the source tree."""
+        schema.load_source_version()
+
+        with patch.object(Path, 'rglob') as rglob:
+            version = schema.code_version()
+
+        rglob.assert_not_called()
+        self.assertEqual(version, schema.source_digest())
+
+    def test_digest_ignores_mtimes(self):
+        """Test touching a source file keeps the digest."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'module.py')
+            with open(path, 'w') as stream:
+                stream.write('VALUE = 1\n')
+            with override_settings(BASE_DIR=directory):
+                before = schema.source_digest()
+                os.utime(path, (0, 0))
+                touched = schema.source_digest()
+                with open(path, 'w') as stream:
+                    stream.write('VALUE = 2\n')
+                changed = schema.source_digest()
+
+        self.assertEqual(touched, before)
+        self.assertNotEqual(changed, before)
@@ -0,0 +1,136 @@
+"""
+Native async read views for the recipe API.
+
+These serve the same data as the recipe list/detail and tag list
+endpoints of the viewsets, but run on the event loop under ASGI instead
+of occupying a worker thread for the whole request. Authentication and
+queries use the async ORM. Paginated list requests are handed to the
+sync viewsets.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+
+from rest_framework import exceptions, status
+
+from core.authentication import CachedTokenAuthentication
+from core.models import (
+    Recipe,
+    Tag
+)
+from core.renderers import FastJSONRenderer
+from recipe import (
+    pagination,
+    payloads,
+    serializers,
+    views,
+)
+from recipe.filters import filter_recipes, filter_tags
+
+sync_recipe_list = views.RecipeViewSet.as_view({'get': 'list'})
+sync_tag_list = views.TagViewSet.as_view({'get': 'list'})
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    """Return a JSON response rendered like the DRF views."""
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code,
+    )
+
+
+def async_api_view(view):
+    """Authenticate a GET request with a token and render API errors."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authenticator = CachedTokenAuthentication()
+        try:
+            if request.method != 'GET':
+                raise exceptions.MethodNotAllowed(request.method)
+
+            credentials = await authenticator.aauthenticate(request)
+            if credentials is None:
+                raise exceptions.NotAuthenticated()
+            request.user, request.auth = credentials
+
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            data = exc.detail
+            if not isinstance(data, (list, dict)):
+                data = {'detail': data}
+            response = render(data, exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated,
+                                exceptions.AuthenticationFailed)):
+                response['WWW-Authenticate'] = \
+                    authenticator.authenticate_header(request)
+            elif isinstance(exc, exceptions.MethodNotAllowed):
+                response['Allow'] = 'GET'
+
+            return response
+
+    return wrapper
+
+
+async def attach_tags(recipes):
+    """Load the tags of recipes with one query, like prefetch_related."""
+    tags = {recipe.id: [] for recipe in recipes}
+    links = Recipe.tags.through.objects.filter(
+        recipe_id__in=tags,
+    ).select_related('tag').order_by('tag_id')
+    async for link in links.aiterator():
+        tags[link.recipe_id].append(link.tag)
+
+    for recipe in recipes:
+        queryset = recipe.tags.all()
+        queryset._result_cache = tags[recipe.id]
+        queryset._prefetch_done = True
+        recipe._prefetched_objects_cache = {'tags': queryset}
+
+
+@async_api_view
+async def recipe_list(request):
+    """List recipes of the authenticated user."""
+    if pagination.RecipeCursorPagination.is_requested(request.GET):
+        return await sync_to_async(sync_recipe_list)(request)
+
+    queryset = filter_recipes(
+        Recipe.objects.filter(user=request.user).order_by('-id'),
+        request.GET,
+    )
+    fields = None
+    if request.GET.get('fields'):
+        fields = serializers.RecipeSerializer.parse_fields(
+            request.GET['fields'],
+        )
+    rows = queryset.values(*payloads.columns(fields))
+
+    return render(await payloads.arecipe_list(rows, fields))
+
+
+@async_api_view
+async def recipe_detail(request, pk):
+    """Retrieve a recipe of the authenticated user."""
+    try:
+        recipe = await Recipe.objects.filter(user=request.user).aget(pk=pk)
+    except Recipe.DoesNotExist:
+        raise exceptions.NotFound()
+    await attach_tags([recipe])
+
+    return render(serializers.RecipeDetailSerializer(recipe).data)
+
+
+@async_api_view
+async def tag_list(request):
+    """List tags of the authenticated user."""
+    if pagination.TagCursorPagination.is_requested(request.GET):
+        return await sync_to_async(sync_tag_list)(request)
+
+    queryset = filter_tags(
+        Tag.objects.filter(user=request.user),
+        request.GET,
+    ).order_by('-name')
+    tags = [tag async for tag in queryset.aiterator()]
+
+    return render(serializers.TagDetailSerializer(tags, many=True).data)
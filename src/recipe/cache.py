@@ -0,0 +1,78 @@
+"""
+Per-user versioned cache for recipe API responses.
+
+Every cached response is keyed on a version token stored per user. Any
+write to the user's recipes, tags or their links replaces the token, so
+older entries are never read again and simply expire.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+def get_cache():
+    """Return the cache backend used for API responses."""
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def is_shared():
+    """Return whether every process sees the same version tokens.
+
+    A local memory cache only sees the writes of its own process, and the
+    dummy cache keeps nothing.
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def version_key(user_id):
+    """Return the cache key holding a user's version token."""
+    return f'recipe:version:{user_id}'
+
+
+def get_version(user_id):
+    """Return the current version token for a user."""
+    cache = get_cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        cache.add(version_key(user_id), uuid.uuid4().hex, timeout=None)
+        version = cache.get(version_key(user_id))
+
+    return version
+
+
+def _replace_version(user_id):
+    get_cache().set(version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of a user.
+
+    The version is replaced straight away and again once the surrounding
+    transaction commits, so a response computed from data read before
+    the commit cannot be stored under the new version.
+    """
+    _replace_version(user_id)
+    transaction.on_commit(lambda: _replace_version(user_id))
+
+
+def response_key(request):
+    """Return the cache key for a request of the authenticated user."""
+    user_id = request.user.pk
+    path = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+
+    return f'recipe:response:{user_id}:{get_version(user_id)}:{path}'
+
+
+def get_response(key):
+    """Return cached response data, or None."""
+    return get_cache().get(key)
+
+
+def set_response(key, data):
+    """Store response data."""
+    get_cache().set(key, data, timeout=settings.RECIPE_CACHE_TIMEOUT)
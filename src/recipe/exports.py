@@ -0,0 +1,81 @@
+"""
+Streaming export of recipes.
+"""
+import csv
+import json
+
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+
+from core.models import Tag
+
+EXPORT_FIELDS = [
+    'id',
+    'title',
+    'description',
+    'time_minutes',
+    'price',
+    'link',
+]
+CHUNK_SIZE = 2000
+TAG_SEPARATOR = '|'
+
+
+class Echo:
+    """File-like object that hands back whatever is written to it."""
+
+    def write(self, value):
+        """Return the value instead of buffering it."""
+        return value
+
+
+def iter_recipes(queryset, chunk_size=CHUNK_SIZE):
+    """Yield recipes as dicts, reading the queryset in chunks."""
+    tags = Tag.objects.only('name').order_by('name')
+    recipes = queryset.only(*EXPORT_FIELDS).prefetch_related(
+        None
+    ).prefetch_related(Prefetch('tags', queryset=tags))
+    for recipe in recipes.iterator(chunk_size=chunk_size):
+        yield {
+            'id': recipe.id,
+            'title': recipe.title,
+            'description': recipe.description,
+            'time_minutes': recipe.time_minutes,
+            'price': str(recipe.price),
+            'link': recipe.link,
+            'tags': [tag.name for tag in recipe.tags.all()],
+        }
+
+
+def iter_ndjson(queryset):
+    """Yield one JSON document per recipe."""
+    for row in iter_recipes(queryset):
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_csv(queryset):
+    """Yield a CSV header followed by one line per recipe."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS + ['tags'])
+    for row in iter_recipes(queryset):
+        row['tags'] = TAG_SEPARATOR.join(row['tags'])
+        yield writer.writerow(row.values())
+
+
+FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv'),
+}
+
+
+def export_response(queryset, export_format):
+    """Return a streaming response with the recipes in the given format."""
+    iter_rows, content_type = FORMATS[export_format]
+    response = StreamingHttpResponse(
+        iter_rows(queryset),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = \
+        f'attachment; filename="recipes.{export_format}"'
+
+    return response
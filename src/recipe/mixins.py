@@ -0,0 +1,141 @@
+"""
+View mixins for the recipe API.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core import metrics
+from recipe import cache
+
+
+def cached_response(handler, request, *args, **kwargs):
+    """Return the cached response for a request or compute and store it."""
+    key = cache.response_key(request)
+    data = cache.get_response(key)
+    metrics.registry.count_cache('recipe_response', data is not None)
+    if data is not None:
+        response = Response(data)
+    else:
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set_response(key, response.data)
+
+    # Let CompressionMiddleware cache the compressed body as well.
+    response.cache_compressed = \
+        response.status_code == status.HTTP_200_OK
+
+    return response
+
+
+class CachedListMixin:
+    """Serve list responses from the per-user response cache."""
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin:
+    """Serve retrieve responses from the per-user response cache."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ValuesListMixin:
+    """Build list responses from ``values()`` rows instead of serializers.
+
+    Views implement ``get_list_columns()`` and ``get_list_payload(rows)``.
+    Pagination works on the rows, which cursor pagination supports.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.prefetch_related(None).values(
+            *self.get_list_columns()
+        )
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.get_list_payload(page))
+
+        return Response(self.get_list_payload(rows))
+
+
+class ConditionalGetMixin:
+    """Answer list and retrieve requests with ETag and Last-Modified.
+
+    Validators are computed before anything is serialized, so an
+    unchanged resource is answered with 304 straight away. With a shared
+    cache, list ETags come from the per-user cache version, which every
+    write replaces, so they cost no query. Otherwise another process may
+    hold an outdated version, and they come from one aggregate query
+    instead. List responses only carry an ETag, since deleting a recipe
+    does not move the newest ``updated_at`` forward.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if cache.is_shared():
+            etag = self._make_etag(request, cache.get_version(request.user.pk))
+        else:
+            state = self.filter_queryset(self.get_queryset()).aggregate(
+                count=Count('id'),
+                max_id=Max('id'),
+                updated_at=Max('updated_at'),
+            )
+            etag = self._make_etag(request, *state.values())
+
+        return self._conditional_response(
+            super().list, request, etag, None, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            updated_at = self.get_queryset().filter(
+                **{self.lookup_field: lookup}
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            updated_at = None
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = self._make_etag(request, lookup, updated_at)
+
+        return self._conditional_response(
+            super().retrieve, request, etag, updated_at, *args, **kwargs
+        )
+
+    def _make_etag(self, request, *state):
+        """Return an ETag for the resource state and representation."""
+        parts = [request.get_full_path(), request.accepted_media_type]
+        parts.extend(str(value) for value in state)
+        digest = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+        return quote_etag(digest[:32])
+
+    def _conditional_response(self, handler, request, etag, updated_at,
+                              *args, **kwargs):
+        """Return 304 if the client copy is current, else the response."""
+        last_modified = int(updated_at.timestamp()) if updated_at else None
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+
+        return response
@@ -0,0 +1,34 @@
+"""
+Pagination for the recipe API.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """Keyset pagination that only applies when the client asks for it."""
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    @classmethod
+    def is_requested(cls, params):
+        """Return whether the query parameters ask for a page."""
+        return cls.cursor_query_param in params or \
+            cls.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate only if a cursor or page size was requested."""
+        if not self.is_requested(request.query_params):
+            return None
+
+        return super().paginate_queryset(queryset, request, view=view)
+
+
+class RecipeCursorPagination(OptInCursorPagination):
+    """Cursor pagination for recipes, newest first."""
+    ordering = '-id'
+
+
+class TagCursorPagination(OptInCursorPagination):
+    """Cursor pagination for tags, in reverse name order."""
+    ordering = '-name'
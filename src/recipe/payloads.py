@@ -0,0 +1,91 @@
+"""
+Read-only recipe list payloads built from ``values()`` rows.
+
+Produces the same data as ``RecipeSerializer(many=True)`` without
+instantiating models or serializer fields per recipe: one query for the
+recipe columns and one for the tags of all listed recipes. Parity with
+the serializer is covered by recipe/tests/test_payloads.py.
+"""
+import functools
+from collections import defaultdict
+
+from core.models import Recipe
+from recipe.serializers import RecipeSerializer
+
+FIELDS = RecipeSerializer.Meta.fields
+
+
+@functools.cache
+def converters():
+    """Return the per-field conversions that differ from the raw value."""
+    price = RecipeSerializer().fields['price']
+
+    return {'price': price.to_representation}
+
+
+def output_fields(fields=None):
+    """Return the fields to output, in serializer order."""
+    if fields is None:
+        return list(FIELDS)
+
+    return [name for name in FIELDS if name in fields]
+
+
+def columns(fields=None):
+    """Return the recipe columns needed for the given fields."""
+    return ['id'] + [
+        name for name in output_fields(fields) if name not in ('id', 'tags')
+    ]
+
+
+def tag_links(recipe_ids):
+    """Return recipe id, tag id and tag name rows for the given recipes."""
+    return Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).order_by('tag_id').values('recipe_id', 'tag_id', 'tag__name')
+
+
+def build(rows, links, fields=None):
+    """Return recipe payloads from recipe rows and tag link rows."""
+    tags = defaultdict(list)
+    for link in links:
+        tags[link['recipe_id']].append({
+            'id': link['tag_id'],
+            'name': link['tag__name'],
+        })
+
+    conversions = converters()
+    names = output_fields(fields)
+    payload = []
+    for row in rows:
+        row['tags'] = tags[row['id']]
+        item = {}
+        for name in names:
+            convert = conversions.get(name)
+            item[name] = row[name] if convert is None else convert(row[name])
+        payload.append(item)
+
+    return payload
+
+
+def recipe_list(rows, fields=None):
+    """Return list payloads for rows of ``values(*columns(fields))``."""
+    rows = list(rows)
+    links = []
+    if rows and 'tags' in output_fields(fields):
+        links = tag_links([row['id'] for row in rows])
+
+    return build(rows, links, fields)
+
+
+async def arecipe_list(rows, fields=None):
+    """Async variant of ``recipe_list`` for a ``values()`` queryset."""
+    rows = [row async for row in rows.aiterator()]
+    links = []
+    if rows and 'tags' in output_fields(fields):
+        links = [
+            link async for link in
+            tag_links([row['id'] for row in rows]).aiterator()
+        ]
+
+    return build(rows, links, fields)
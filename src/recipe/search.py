@@ -0,0 +1,26 @@
+"""
+Full-text search over recipes.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+
+SEARCH_CONFIG = 'english'
+
+
+def search_recipes(queryset, text):
+    """Filter recipes matching the text, best matches first.
+
+    On PostgreSQL this uses the indexed ``search_vector`` column, in which
+    the title is weighted above the description. Other databases fall back
+    to a case-insensitive substring match.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(
+            Q(title__icontains=text) | Q(description__icontains=text)
+        )
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query),
+    ).order_by('-rank', '-id')
@@ -1,12 +1,47 @@
 """
 Serializers for the recipe API view.
 """
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
 from rest_framework import serializers
 
 from core.models import (
     Recipe,
-    Tag
+    RecipeStats,
+    Tag,
+    stats_values,
 )
+from recipe import cache
+
+BATCH_MAX_SIZE = 1000
+
+
+def get_or_create_tags(user_id, names):
+    """Return a name to tag mapping, creating missing tags in bulk."""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+
+    tags = {
+        tag.name: tag
+        for tag in Tag.objects.filter(user_id=user_id, name__in=names)
+    }
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(user_id=user_id, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags.update(
+            (tag.name, tag)
+            for tag in Tag.objects.filter(user_id=user_id, name__in=missing)
+        )
+
+    return tags
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -17,8 +52,90 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
         read_only_fields = ['id']
 
+    def validate_name(self, value):
+        """Reject a name another tag of the user already has.
+
+        Nested in a recipe, existing names refer to the existing tags.
+        """
+        if self.parent is not None:
+            return value
+
+        tags = Tag.objects.filter(
+            user=self.context['request'].user,
+            name=value,
+        )
+        if self.instance is not None:
+            tags = tags.exclude(pk=self.instance.pk)
+        if tags.exists():
+            raise serializers.ValidationError(
+                _('You already have a tag with this name.')
+            )
+
+        return value
+
+
+class TagDetailSerializer(TagSerializer):
+    """Serializer for tags with the number of recipes using them."""
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+        read_only_fields = TagSerializer.Meta.read_only_fields + [
+            'recipe_count'
+        ]
 
-class RecipeSerializer(serializers.ModelSerializer):
+
+class TimeBucketSerializer(serializers.Serializer):
+    """Serializer for the number of recipes in a cooking time range."""
+    min_minutes = serializers.IntegerField()
+    max_minutes = serializers.IntegerField(allow_null=True)
+    recipe_count = serializers.IntegerField()
+
+
+class RecipeStatsSerializer(serializers.Serializer):
+    """Serializer for the recipe stats of a user."""
+    recipe_count = serializers.IntegerField()
+    price_average = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        allow_null=True,
+    )
+    price_min = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        allow_null=True,
+    )
+    price_max = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        allow_null=True,
+    )
+    time_minutes = TimeBucketSerializer(many=True)
+    top_tags = TagDetailSerializer(many=True)
+
+
+class SparseFieldsMixin:
+    """Serializer mixin that only keeps the fields passed as ``fields``."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """Return the field names of a comma separated ``fields`` value."""
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in cls.Meta.fields]
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': [_('Unknown fields: %s.') % ', '.join(unknown)]
+            })
+
+        return fields
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
     tags = TagSerializer(many=True, required=False)
 
@@ -26,22 +143,34 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ['id', 'title', 'time_minutes', 'price', 'link', 'tags']
         read_only_fields = ['id']
+        # Recipe stats bucket cooking times from zero minutes up.
+        extra_kwargs = {'time_minutes': {'min_value': 0}}
 
-    def _get_or_create_tags(self, tags, recipe):
-        """Handle getting or createing tags as needed."""
+    def _set_tags(self, tags, recipe, created=False):
+        """Link the recipe to exactly the given tags, writing only changes."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        tag_ids = {
+            tag.id for tag in get_or_create_tags(
+                auth_user.id,
+                [tag['name'] for tag in tags],
+            ).values()
+        }
+        current_ids = set() if created else {
+            tag.id for tag in recipe.tags.all()
+        }
+
+        removed_ids = current_ids - tag_ids
+        if removed_ids:
+            recipe.tags.remove(*removed_ids)
+        added_ids = tag_ids - current_ids
+        if added_ids:
+            recipe.tags.add(*added_ids)
 
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop('tags', [])
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags=tags, recipe=recipe)
+        self._set_tags(tags=tags, recipe=recipe, created=True)
 
         return recipe
 
@@ -49,8 +178,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         """Update a recipe."""
         tags = validated_data.pop('tags', None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags=tags, recipe=instance)
+            self._set_tags(tags=tags, recipe=instance)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -64,3 +192,142 @@ class RecipeDetailSerializer(RecipeSerializer):
 
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ['description']
+
+
+class RecipeBatchItemSerializer(RecipeDetailSerializer):
+    """Serializer for a single entry of a recipe batch."""
+    id = serializers.IntegerField(required=False, min_value=1)
+
+    class Meta(RecipeDetailSerializer.Meta):
+        read_only_fields = []
+
+    def validate_id(self, value):
+        """Check the recipe exists and is only updated once."""
+        if value not in self.parent.recipes:
+            raise serializers.ValidationError(_('Recipe not found.'))
+        if value in self.parent.seen_ids:
+            raise serializers.ValidationError(
+                _('Recipe appears more than once.')
+            )
+        self.parent.seen_ids.add(value)
+
+        return value
+
+
+class RecipeBatchSerializer(serializers.ListSerializer):
+    """Serializer for creating and updating recipes in bulk.
+
+    Entries with an ``id`` update that recipe, the others create a new one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('child', RecipeBatchItemSerializer())
+        kwargs.setdefault('allow_empty', False)
+        kwargs.setdefault('max_length', BATCH_MAX_SIZE)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        """Load the recipes being updated, then validate every entry."""
+        ids = []
+        if isinstance(data, list):
+            ids = [
+                int(item['id']) for item in data
+                if isinstance(item, dict) and str(item.get('id')).isdigit()
+            ]
+        auth_user = self.context['request'].user
+        self.recipes = Recipe.objects.filter(user=auth_user).in_bulk(ids)
+        self.seen_ids = set()
+
+        return super().to_internal_value(data)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Write every entry using bulk queries."""
+        auth_user = self.context['request'].user
+        results = []
+        new_recipes = []
+        updated_recipes = []
+        updated_fields = set()
+        recipe_tags = []
+        removed_stats = []
+
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            attrs.pop('user', None)
+            tags = attrs.pop('tags', None)
+            recipe_id = attrs.pop('id', None)
+
+            if recipe_id is None:
+                recipe = Recipe(user=auth_user, **attrs)
+                new_recipes.append(recipe)
+                tags = tags or []
+            else:
+                recipe = self.recipes[recipe_id]
+                removed_stats.append(stats_values(recipe))
+                for attr, value in attrs.items():
+                    setattr(recipe, attr, value)
+                updated_recipes.append(recipe)
+                updated_fields.update(attrs)
+
+            results.append(recipe)
+            if tags is not None:
+                recipe_tags.append((recipe, tags))
+
+        Recipe.objects.bulk_create(new_recipes)
+        if updated_recipes:
+            now = timezone.now()
+            for recipe in updated_recipes:
+                recipe.updated_at = now
+            Recipe.objects.bulk_update(
+                updated_recipes,
+                sorted(updated_fields | {'updated_at'}),
+            )
+
+        # Bulk writes skip the model signals, so update the stats here.
+        RecipeStats.objects.record(
+            added=[stats_values(recipe) for recipe in results],
+            removed=removed_stats,
+        )
+        self._set_tags(auth_user.id, recipe_tags)
+        cache.bump_version(auth_user.id)
+
+        return results
+
+    def _set_tags(self, user_id, recipe_tags):
+        """Replace the tags of each recipe, writing only changed links."""
+        tags = get_or_create_tags(
+            user_id,
+            [tag['name'] for _recipe, names in recipe_tags for tag in names],
+        )
+        wanted = {
+            (recipe.id, tags[tag['name']].id)
+            for recipe, names in recipe_tags
+            for tag in names
+        }
+
+        RecipeTag = Recipe.tags.through
+        links = RecipeTag.objects.filter(recipe_id__in=[
+            recipe.id for recipe, _names in recipe_tags
+            if recipe.id in self.recipes
+        ]).values_list('id', 'recipe_id', 'tag_id')
+        current = {}
+        for link_id, recipe_id, tag_id in links:
+            current[(recipe_id, tag_id)] = link_id
+
+        removed = {
+            pair: link_id for pair, link_id in current.items()
+            if pair not in wanted
+        }
+        if removed:
+            RecipeTag.objects.filter(id__in=removed.values()).delete()
+
+        added = [pair for pair in wanted if pair not in current]
+        RecipeTag.objects.bulk_create([
+            RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id, tag_id in added
+        ])
+
+        # Bulk writes skip m2m_changed, so update the tag counts here.
+        deltas = Counter(tag_id for _recipe_id, tag_id in added)
+        deltas.subtract(tag_id for _recipe_id, tag_id in removed)
+        Tag.objects.adjust_recipe_counts(deltas)
@@ -0,0 +1,39 @@
+"""
+Signal handlers for the recipe API.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import (
+    Recipe,
+    Tag
+)
+from recipe import cache
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    """Invalidate cached responses of the owner of a recipe or tag."""
+    cache.bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags_cache(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe tags change."""
+    if action.startswith('post_'):
+        cache.bump_version(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_new_user_cache(sender, instance, created, **kwargs):
+    """Start new users on a fresh version.
+
+    Guards against entries left behind by a deleted user whose id gets
+    reused.
+    """
+    if created:
+        cache.bump_version(instance.pk)
@@ -0,0 +1,56 @@
+"""
+Recipe statistics read from the incrementally maintained summary table.
+"""
+from core.models import (
+    TIME_BUCKETS,
+    RecipeStats,
+    Tag,
+    time_bucket_bounds,
+)
+
+TOP_TAGS = 5
+
+
+def summarize(user_id):
+    """Return the recipe stats of a user.
+
+    Reads at most one summary row per cooking time bucket and the most
+    used tags, instead of aggregating over the recipes.
+    """
+    rows = {
+        row.time_bucket: row
+        for row in RecipeStats.objects.filter(
+            user_id=user_id,
+            recipe_count__gt=0,
+        )
+    }
+    count = sum(row.recipe_count for row in rows.values())
+    lows = [row.price_min for row in rows.values()]
+    highs = [row.price_max for row in rows.values()]
+
+    time_minutes = []
+    for bucket in range(len(TIME_BUCKETS) + 1):
+        low, high = time_bucket_bounds(bucket)
+        row = rows.get(bucket)
+        time_minutes.append({
+            'min_minutes': low,
+            'max_minutes': high,
+            'recipe_count': row.recipe_count if row else 0,
+        })
+
+    top_tags = Tag.objects.filter(
+        user_id=user_id,
+        recipe_count__gt=0,
+    ).order_by('-recipe_count', 'name')[:TOP_TAGS]
+
+    return {
+        'recipe_count': count,
+        'price_average': (
+            sum(row.price_total for row in rows.values()) / count
+            if count else None
+        ),
+        'price_min': min(lows) if lows else None,
+        'price_max': max(highs) if highs else None,
+        'time_minutes': time_minutes,
+        'top_tags': list(top_tags),
+    }
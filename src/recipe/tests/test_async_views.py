@@ -0,0 +1,226 @@
+"""
+Tests for the async read views.
+"""
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import token_cache
+from core.models import (
+    Recipe,
+    Tag
+)
+
+RECIPES_URL = reverse('recipe:async-recipe-list')
+TAGS_URL = reverse('recipe:async-tag-list')
+
+
+def detail_url(recipe_id):
+    """Create and return an async recipe detail URL."""
+    return reverse('recipe:async-recipe-detail', args=[recipe_id])
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+        'description': 'Sample description',
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicAsyncViewsTests(TestCase):
+    """Test unauthenticated async requests."""
+
+    def setUp(self):
+        token_cache.clear()
+
+    async def test_auth_required(self):
+        """Test auth is required to call the async views."""
+        for url in [RECIPES_URL, detail_url(1), TAGS_URL]:
+            res = await self.async_client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+    async def test_invalid_token(self):
+        """Test an unknown token is rejected."""
+        res = await self.async_client.get(
+            RECIPES_URL,
+            headers={'Authorization': 'Token unknown'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.json(), {'detail': 'Invalid token.'})
+
+    async def test_inactive_user_rejected(self):
+        """Test tokens of inactive users are rejected."""
+        user = await get_user_model().objects.acreate(
+            email='inactive@example.com',
+            is_active=False,
+        )
+        token = await Token.objects.acreate(user=user)
+
+        res = await self.async_client.get(
+            RECIPES_URL,
+            headers={'Authorization': f'Token {token.key}'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateAsyncViewsTests(TestCase):
+    """Test authenticated async requests."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {'Authorization': f'Token {self.token.key}'}
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.user)
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        dessert = Tag.objects.create(user=self.user, name='Dessert')
+        self.recipe = create_recipe(user=self.user, title='Cake')
+        self.recipe.tags.add(vegan, dessert)
+        create_recipe(user=self.user, title='Soup').tags.add(vegan)
+        create_recipe(user=self.user, title='Bread')
+
+        other = create_user(email='other@example.com')
+        create_recipe(user=other, title='Other')
+        Tag.objects.create(user=other, name='Other')
+
+    async def sync_get(self, url):
+        """Request a URL from the sync viewsets."""
+        return await sync_to_async(self.sync_client.get)(url)
+
+    async def test_recipe_list_matches_sync(self):
+        """Test the async list returns the sync list data."""
+        res = await self.async_client.get(RECIPES_URL, headers=self.headers)
+        sync_res = await self.sync_get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(res.content, sync_res.content)
+        self.assertEqual(len(res.json()), 3)
+
+    async def test_recipe_list_filters(self):
+        """Test search and tag filters apply to the async list."""
+        tag = await Tag.objects.aget(user=self.user, name='Dessert')
+
+        res = await self.async_client.get(
+            RECIPES_URL,
+            {'tags': str(tag.id)},
+            headers=self.headers,
+        )
+
+        self.assertEqual([r['title'] for r in res.json()], ['Cake'])
+
+    async def test_recipe_list_invalid_tags(self):
+        """Test a malformed tags parameter is a validation error."""
+        res = await self.async_client.get(
+            RECIPES_URL,
+            {'tags': 'a,b'},
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.json())
+
+    async def test_recipe_list_selected_fields(self):
+        """Test the async list returns only the requested fields."""
+        res = await self.async_client.get(
+            RECIPES_URL,
+            {'fields': 'title,tags'},
+            headers=self.headers,
+        )
+        sync_res = await self.sync_get(
+            f'{reverse("recipe:recipe-list")}?fields=title,tags'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, sync_res.content)
+        self.assertEqual(set(res.json()[0]), {'title', 'tags'})
+
+    async def test_recipe_list_unknown_fields(self):
+        """Test unknown fields are a validation error."""
+        res = await self.async_client.get(
+            RECIPES_URL,
+            {'fields': 'title,secret'},
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.json())
+
+    async def test_recipe_list_paginated(self):
+        """Test paginated lists are served like the sync view."""
+        res = await self.async_client.get(
+            RECIPES_URL,
+            {'page_size': 2},
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()['results']), 2)
+        self.assertIsNotNone(res.json()['next'])
+
+    async def test_recipe_detail_matches_sync(self):
+        """Test the async detail returns the sync detail data."""
+        res = await self.async_client.get(
+            detail_url(self.recipe.id),
+            headers=self.headers,
+        )
+        sync_res = await self.sync_get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, sync_res.content)
+
+    async def test_recipe_detail_other_user(self):
+        """Test recipes of other users are not found."""
+        recipe = await Recipe.objects.aget(title='Other')
+
+        res = await self.async_client.get(
+            detail_url(recipe.id),
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_tag_list_matches_sync(self):
+        """Test the async tag list returns the sync tag list data."""
+        res = await self.async_client.get(TAGS_URL, headers=self.headers)
+        sync_res = await self.sync_get(reverse('recipe:tag-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync_res.json())
+        self.assertEqual(
+            [tag['name'] for tag in res.json()],
+            ['Vegan', 'Dessert'],
+        )
+
+    async def test_method_not_allowed(self):
+        """Test the async views are read only."""
+        res = await self.async_client.post(RECIPES_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(res['Allow'], 'GET')
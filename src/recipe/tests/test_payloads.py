@@ -0,0 +1,110 @@
+"""
+Tests for the values() based recipe list payloads.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag
+)
+from recipe import payloads
+from recipe.serializers import RecipeSerializer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+class RecipePayloadParityTests(TestCase):
+    """Test payloads render exactly like RecipeSerializer."""
+
+    def setUp(self):
+        self.user = create_user()
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dessert', 'Früh stück', '"Quoted"']
+        ]
+        recipes = [
+            ('Cake', 45, Decimal('5.5'), 'https://example.com/cake'),
+            ('Soup', 1, Decimal('0'), ''),
+            ('Crème brûlée', 120, Decimal('999.99'), ''),
+            ('Bread', 0, Decimal('12.30'), 'https://example.com/b?x=1&y=2'),
+        ]
+        for i, (title, minutes, price, link) in enumerate(recipes):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=minutes,
+                price=price,
+                link=link,
+            )
+            recipe.tags.add(*tags[i:])
+
+    def queryset(self):
+        return Recipe.objects.filter(user=self.user).order_by('-id')
+
+    def assertParity(self, fields=None):
+        """Assert both paths render the same bytes for the given fields."""
+        recipes = self.queryset().prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id'))
+        )
+        expected = RecipeSerializer(recipes, many=True, fields=fields).data
+        rows = self.queryset().values(*payloads.columns(fields))
+        actual = payloads.recipe_list(rows, fields)
+
+        self.assertEqual(
+            JSONRenderer().render(actual),
+            JSONRenderer().render(expected),
+        )
+
+    def test_all_fields(self):
+        """Test the full payload matches the serializer."""
+        self.assertParity()
+
+    def test_sparse_fields(self):
+        """Test field subsets match the serializer."""
+        for fields in [['id'], ['title', 'tags'], ['tags', 'price', 'id']]:
+            with self.subTest(fields=fields):
+                self.assertParity(fields)
+
+    def test_no_recipes(self):
+        """Test an empty list needs no tag query."""
+        with self.assertNumQueries(1):
+            payload = payloads.recipe_list(
+                self.queryset().filter(title='Missing').values(
+                    *payloads.columns()
+                )
+            )
+
+        self.assertEqual(payload, [])
+
+    def test_two_queries(self):
+        """Test recipes and their tags are loaded with two queries."""
+        with self.assertNumQueries(2):
+            payloads.recipe_list(self.queryset().values(*payloads.columns()))
+
+    def test_list_endpoint_matches_serializer(self):
+        """Test the list endpoint renders the serializer output."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        recipes = self.queryset().prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id'))
+        )
+        expected = RecipeSerializer(recipes, many=True).data
+
+        res = client.get(RECIPES_URL)
+        page = client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.content, JSONRenderer().render(expected))
+        self.assertEqual(page.json()['results'], res.json()[:2])
@@ -1,10 +1,22 @@
 """
 Tests for recipe APIs.
 """
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
 from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -12,15 +24,19 @@ from rest_framework.test import APIClient
 
 from core.models import (
     Recipe,
+    RecipeStats,
     Tag
 )
 
+from recipe import cache
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
 )
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BATCH_URL = reverse('recipe:recipe-batch')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 
 def detail_url(recipe_id):
@@ -129,6 +145,20 @@ class PrivateRecipesAPITests(TestCase):
             self.assertEqual(getattr(recipe, k), v)
         self.assertEqual(recipe.user, self.user)
 
+    def test_create_recipe_negative_time(self):
+        """Test a negative cooking time is rejected."""
+        payload = {
+            'title': 'Sample recipe title',
+            'time_minutes': -5,
+            'price': Decimal('5.25')
+        }
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('time_minutes', res.data)
+        self.assertFalse(Recipe.objects.exists())
+
     def test_partial_update(self):
         """Test partial update of a recipe."""
         original_link = 'https://example.com/recipe.pdf'
@@ -329,3 +359,862 @@ class PrivateRecipesAPITests(TestCase):
         res = self.client.patch(url, payload, format='json')
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.tags.count(), 0)
+
+    def test_list_recipes_query_count_constant(self):
+        """Test listing recipes runs a constant number of queries."""
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            for j in range(3):
+                tag = Tag.objects.create(user=self.user, name=f'Tag {i}-{j}')
+                recipe.tags.add(tag)
+
+        # The ETag aggregate, the recipes and their tags.
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+        for recipe in res.data:
+            self.assertEqual(len(recipe['tags']), 3)
+
+    def test_get_recipe_detail_query_count_constant(self):
+        """Test retrieving a recipe runs a constant number of queries."""
+        recipe = create_recipe(user=self.user)
+        for i in range(5):
+            tag = Tag.objects.create(user=self.user, name=f'Tag {i}')
+            recipe.tags.add(tag)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 5)
+
+    def test_list_recipes_unpaginated_by_default(self):
+        """Test recipes are returned as a plain list without a cursor."""
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, list)
+
+    def test_list_recipes_cursor_pagination(self):
+        """Test paging through recipes with a cursor."""
+        recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+        expected_ids = [recipe.id for recipe in reversed(recipes)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['previous'])
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            expected_ids[:2]
+        )
+
+        seen = [r['id'] for r in res.data['results']]
+        next_url = res.data['next']
+        while next_url:
+            res = self.client.get(next_url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertIsNotNone(res.data['previous'])
+            seen.extend(r['id'] for r in res.data['results'])
+            next_url = res.data['next']
+
+        self.assertEqual(seen, expected_ids)
+
+    def test_list_recipes_invalid_cursor(self):
+        """Test an invalid cursor returns an error."""
+        res = self.client.get(RECIPES_URL, {'cursor': 'invalid'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_recipe_with_many_tags_query_count(self):
+        """Test tags are resolved and linked with a fixed number of queries."""
+        Tag.objects.create(user=self.user, name='Tag 0')
+        payload = {
+            'title': 'Sample recipe title',
+            'time_minutes': 22,
+            'price': Decimal('5.25'),
+            'tags': [{'name': f'Tag {i}'} for i in range(20)],
+        }
+
+        with self.assertNumQueries(10):
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 20)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 20)
+
+    def test_create_recipe_with_duplicate_tags(self):
+        """Test repeated tag names in a payload create a single tag."""
+        payload = {
+            'title': 'Sample recipe title',
+            'time_minutes': 22,
+            'price': Decimal('5.25'),
+            'tags': [{'name': 'Lunch'}, {'name': 'Lunch'}],
+        }
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_update_recipe_tags_keeps_unchanged_links(self):
+        """Test updating tags only writes the links that changed."""
+        recipe = create_recipe(user=self.user)
+        tag_breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        tag_dinner = Tag.objects.create(user=self.user, name='Dinner')
+        recipe.tags.add(tag_breakfast, tag_dinner)
+        RecipeTag = Recipe.tags.through
+        kept_link = RecipeTag.objects.get(recipe=recipe, tag=tag_breakfast)
+
+        payload = {'tags': [{'name': 'Breakfast'}, {'name': 'Lunch'}]}
+        res = self.client.patch(
+            detail_url(recipe.id),
+            payload,
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(tag['name'] for tag in res.data['tags']),
+            ['Breakfast', 'Lunch']
+        )
+        self.assertTrue(RecipeTag.objects.filter(id=kept_link.id).exists())
+        self.assertNotIn(tag_dinner, recipe.tags.all())
+
+
+class RecipeBatchAPITests(TestCase):
+    """Test the recipe batch API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_batch_create_recipes(self):
+        """Test creating several recipes with tags in one request."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10 + i,
+                'price': '2.50',
+                'tags': [{'name': 'Dinner'}, {'name': f'Tag {i}'}],
+            }
+            for i in range(3)
+        ]
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        for item, result in zip(payload, res.data):
+            recipe = Recipe.objects.get(id=result['id'], user=self.user)
+            self.assertEqual(recipe.title, item['title'])
+            self.assertEqual(
+                sorted(tag.name for tag in recipe.tags.all()),
+                sorted(tag['name'] for tag in item['tags'])
+            )
+
+    def test_batch_negative_time(self):
+        """Test a batch with a negative cooking time is rejected."""
+        payload = [
+            {'title': 'Recipe', 'time_minutes': 10, 'price': '2.50'},
+            {'title': 'Recipe', 'time_minutes': -1, 'price': '2.50'},
+        ]
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_batch_query_count_constant(self):
+        """Test batch size does not change the number of queries."""
+        def payload(size):
+            return [
+                {
+                    'title': f'Recipe {i}',
+                    'time_minutes': 10,
+                    'price': '2.50',
+                    'tags': [{'name': f'Tag {i}'}, {'name': 'Shared'}],
+                }
+                for i in range(size)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(BATCH_URL, payload(2), format='json')
+        Recipe.objects.all().delete()
+        Tag.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(BATCH_URL, payload(50), format='json')
+
+        self.assertEqual(len(small), len(large))
+
+    def test_batch_update_recipes(self):
+        """Test updating recipes and their tags in one request."""
+        recipe = create_recipe(user=self.user, title='Old title')
+        tag_breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        tag_lunch = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(tag_breakfast)
+        untouched = create_recipe(user=self.user, title='Untouched')
+        untouched.tags.add(tag_breakfast)
+        payload = [
+            {
+                'id': recipe.id,
+                'title': 'New title',
+                'time_minutes': 5,
+                'price': '1.00',
+                'tags': [{'name': 'Lunch'}],
+            },
+            {
+                'title': 'Created',
+                'time_minutes': 5,
+                'price': '1.00',
+            },
+        ]
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data[0]['id'], recipe.id)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New title')
+        self.assertEqual(recipe.link, 'https://example.com/recipe.pdf')
+        self.assertEqual(list(recipe.tags.all()), [tag_lunch])
+        self.assertEqual(list(untouched.tags.all()), [tag_breakfast])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        tag_breakfast.refresh_from_db()
+        tag_lunch.refresh_from_db()
+        self.assertEqual(tag_breakfast.recipe_count, 1)
+        self.assertEqual(tag_lunch.recipe_count, 1)
+        self.assertEqual(
+            list(RecipeStats.objects.filter(
+                user=self.user,
+                recipe_count__gt=0,
+            ).order_by('time_bucket').values_list(
+                'time_bucket', 'recipe_count', 'price_total',
+            )),
+            [(0, 2, Decimal('2.00')), (1, 1, Decimal('5.25'))],
+        )
+
+    def test_batch_returns_per_item_errors(self):
+        """Test invalid entries are reported and nothing is written."""
+        other_user = create_user(
+            email='other@example.com',
+            password='password123'
+        )
+        other_recipe = create_recipe(user=other_user)
+        payload = [
+            {'title': 'Valid', 'time_minutes': 5, 'price': '1.00'},
+            {'title': 'Missing time', 'price': '1.00'},
+            {
+                'id': other_recipe.id,
+                'title': 'Not mine',
+                'time_minutes': 5,
+                'price': '1.00',
+            },
+        ]
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('time_minutes', res.data[1])
+        self.assertIn('id', res.data[2])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        other_recipe.refresh_from_db()
+        self.assertNotEqual(other_recipe.title, 'Not mine')
+
+    def test_batch_requires_list(self):
+        """Test a non-list payload is rejected."""
+        payload = {'title': 'Single', 'time_minutes': 5, 'price': '1.00'}
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeExportAPITests(TestCase):
+    """Test the recipe export API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as NDJSON."""
+        recipe = create_recipe(user=self.user, title='Curry')
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name='Dinner'),
+            Tag.objects.create(user=self.user, name='Spicy'),
+        )
+        create_recipe(user=self.user, title='Soup')
+        other_user = create_user(
+            email='other@example.com',
+            password='password123'
+        )
+        create_recipe(user=other_user, title='Not mine')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        content = b''.join(res.streaming_content).decode()
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Soup', 'Curry'])
+        self.assertEqual(rows[1], {
+            'id': recipe.id,
+            'title': 'Curry',
+            'description': recipe.description,
+            'time_minutes': recipe.time_minutes,
+            'price': '5.25',
+            'link': recipe.link,
+            'tags': ['Dinner', 'Spicy'],
+        })
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV."""
+        recipe = create_recipe(user=self.user, title='Curry, hot')
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name='Dinner'),
+            Tag.objects.create(user=self.user, name='Spicy'),
+        )
+
+        res = self.client.get(EXPORT_URL, {'type': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(recipe.id))
+        self.assertEqual(rows[0]['title'], 'Curry, hot')
+        self.assertEqual(rows[0]['price'], '5.25')
+        self.assertEqual(rows[0]['tags'], 'Dinner|Spicy')
+
+    def test_export_invalid_type(self):
+        """Test an unknown export type returns an error."""
+        res = self.client.get(EXPORT_URL, {'type': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(RECIPE_CACHE_ALIAS='default')
+class RecipeResponseCacheTests(TestCase):
+    """Test caching of recipe API responses."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """Test a repeated list request only queries its ETag."""
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def test_repeated_detail_served_from_cache(self):
+        """Test a repeated detail request skips the database."""
+        recipe = create_recipe(user=self.user)
+        self.client.get(detail_url(recipe.id))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data['id'], recipe.id)
+
+    def test_compressed_list_cached(self):
+        """Test cached lists are served with cached compressed bytes."""
+        for i in range(20):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+        plain = self.client.get(RECIPES_URL)
+
+        with patch('django.utils.text.gzip_compress',
+                   wraps=gzip.compress) as gzip_compress:
+            first = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        gzip_compress.assert_called_once()
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(gzip.decompress(second.content), plain.content)
+
+    def test_cache_invalidated_on_update(self):
+        """Test updating a recipe invalidates cached responses."""
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+        self.client.get(detail_url(recipe.id))
+
+        self.client.patch(
+            detail_url(recipe.id),
+            {'title': 'New title', 'tags': [{'name': 'Lunch'}]},
+            format='json'
+        )
+        list_res = self.client.get(RECIPES_URL)
+        detail_res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(list_res.data[0]['title'], 'New title')
+        self.assertEqual(detail_res.data['tags'][0]['name'], 'Lunch')
+
+    def test_cache_invalidated_on_tag_change(self):
+        """Test changing a tag invalidates cached recipe responses."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(tag)
+        self.client.get(RECIPES_URL)
+
+        tag.name = 'Dinner'
+        tag.save()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'Dinner')
+
+    def test_cache_invalidated_on_delete(self):
+        """Test deleting a recipe invalidates cached responses."""
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        self.client.delete(detail_url(recipe.id))
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data, [])
+
+    def test_cache_invalidated_on_batch(self):
+        """Test batch writes invalidate cached responses."""
+        self.client.get(RECIPES_URL)
+
+        self.client.post(
+            BATCH_URL,
+            [{'title': 'Batch', 'time_minutes': 5, 'price': '1.00'}],
+            format='json'
+        )
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_cache_separated_per_user(self):
+        """Test users never see each other's cached responses."""
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+        other_user = create_user(
+            email='other@example.com',
+            password='password123'
+        )
+
+        self.client.force_authenticate(user=other_user)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data, [])
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(tempfile.gettempdir(), 'recipe-cache'),
+        }
+    })
+    def test_file_based_cache(self):
+        """Test responses can be cached with the file based backend."""
+        caches['default'].clear()
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.data, first.data)
+
+
+class RecipeConditionalGetTests(TestCase):
+    """Test conditional GET requests for recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_detail_not_modified(self):
+        """Test a matching ETag returns 304 without a body."""
+        recipe = create_recipe(user=self.user)
+        res = self.client.get(detail_url(recipe.id))
+        etag = res['ETag']
+        self.assertIn('Last-Modified', res)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(recipe.id),
+                HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+    def test_detail_if_modified_since(self):
+        """Test If-Modified-Since returns 304 for an unchanged recipe."""
+        recipe = create_recipe(user=self.user)
+        res = self.client.get(detail_url(recipe.id))
+
+        res = self.client.get(
+            detail_url(recipe.id),
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified']
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_after_update(self):
+        """Test updating a recipe changes its ETag."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        self.client.patch(detail_url(recipe.id), {'title': 'New title'})
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_tag_change_updates_recipe(self):
+        """Test changing tags moves updated_at forward."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        before = recipe.updated_at
+
+        recipe.tags.add(tag)
+        recipe.refresh_from_db()
+        after_add = recipe.updated_at
+        tag.name = 'Dinner'
+        tag.save()
+        recipe.refresh_from_db()
+        after_rename = recipe.updated_at
+        tag.delete()
+        recipe.refresh_from_db()
+
+        self.assertGreater(after_add, before)
+        self.assertGreater(after_rename, after_add)
+        self.assertGreater(recipe.updated_at, after_rename)
+
+    def test_list_not_modified(self):
+        """Test an unchanged list returns 304."""
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(tempfile.gettempdir(), 'recipe-cache'),
+        }
+    }, RECIPE_CACHE_ALIAS='default')
+    def test_list_not_modified_without_queries(self):
+        """Test a shared cache checks the list ETag without queries."""
+        caches['default'].clear()
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_without_cache(self):
+        """Test list ETags follow the recipes when nothing is cached."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        recipe.delete()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(RECIPE_CACHE_ALIAS='default')
+    def test_list_etag_with_local_cache(self):
+        """Test a local cache does not hide writes of other processes."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+        version = cache.get_version(self.user.id)
+
+        create_recipe(user=self.user)
+        # Another process does not see the version bumped by this write.
+        cache.get_cache().set(cache.version_key(self.user.id), version)
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_modified_after_delete(self):
+        """Test deleting a recipe changes the list ETag."""
+        recipe = create_recipe(user=self.user)
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        recipe.delete()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_list_etag_depends_on_query(self):
+        """Test pages of the list get different ETags."""
+        create_recipe(user=self.user)
+
+        full = self.client.get(RECIPES_URL)
+        page = self.client.get(RECIPES_URL, {'page_size': 1})
+
+        self.assertNotEqual(full['ETag'], page['ETag'])
+
+
+class RecipeSearchAPITests(TestCase):
+    """Test searching recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_search_title_and_description(self):
+        """Test search matches the title or the description."""
+        by_title = create_recipe(
+            user=self.user,
+            title='Chicken curry',
+            description='Spicy dinner',
+        )
+        by_description = create_recipe(
+            user=self.user,
+            title='Rice bowl',
+            description='Leftover chicken with rice',
+        )
+        create_recipe(user=self.user, title='Pancakes', description='Sweet')
+        other_user = create_user(
+            email='other@example.com',
+            password='password123'
+        )
+        create_recipe(user=other_user, title='Chicken soup')
+
+        res = self.client.get(RECIPES_URL, {'search': 'chicken'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(recipe['id'] for recipe in res.data),
+            sorted([by_title.id, by_description.id])
+        )
+
+    def test_search_no_match(self):
+        """Test a search without matches returns an empty list."""
+        create_recipe(user=self.user, title='Pancakes')
+
+        res = self.client.get(RECIPES_URL, {'search': 'chicken'})
+
+        self.assertEqual(res.data, [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_search_ranks_title_above_description(self):
+        """Test title matches are ranked above description matches."""
+        by_description = create_recipe(
+            user=self.user,
+            title='Rice bowl',
+            description='Leftover chicken with rice',
+        )
+        by_title = create_recipe(
+            user=self.user,
+            title='Roast chicken',
+            description='Sunday lunch',
+        )
+        create_recipe(user=self.user, title='Pancakes', description='Sweet')
+
+        res = self.client.get(RECIPES_URL, {'search': 'chickens'})
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data],
+            [by_title.id, by_description.id]
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_search_uses_gin_index(self):
+        """Test the search query can be answered from the GIN index."""
+        create_recipe(user=self.user, title='Roast chicken')
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        plan = Recipe.objects.filter(
+            search_vector=SearchQuery('chicken', config='english')
+        ).explain()
+
+        self.assertIn('recipe_search_vector_idx', plan)
+
+
+class RecipeTagFilterAPITests(TestCase):
+    """Test filtering recipes by tags."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.tag_vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.tag_quick = Tag.objects.create(user=self.user, name='Quick')
+        self.both = create_recipe(user=self.user, title='Salad')
+        self.both.tags.add(self.tag_vegan, self.tag_quick)
+        self.vegan = create_recipe(user=self.user, title='Tofu stew')
+        self.vegan.tags.add(self.tag_vegan)
+        self.untagged = create_recipe(user=self.user, title='Steak')
+
+    def test_filter_by_any_tag(self):
+        """Test recipes with any of the tags are returned once."""
+        params = {'tags': f'{self.tag_vegan.id},{self.tag_quick.id}'}
+
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data],
+            [self.vegan.id, self.both.id]
+        )
+
+    def test_filter_by_all_tags(self):
+        """Test only recipes with every tag are returned."""
+        params = {
+            'tags': f'{self.tag_vegan.id},{self.tag_quick.id}',
+            'tags_match': 'all',
+        }
+
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([recipe['id'] for recipe in res.data], [self.both.id])
+
+    def test_filter_by_tags_single_query(self):
+        """Test the number of queries does not grow with the tag count."""
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(10)
+        ]
+        for tag in tags:
+            self.both.tags.add(tag)
+        params = {
+            'tags': ','.join(str(tag.id) for tag in tags),
+            'tags_match': 'all',
+        }
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual([recipe['id'] for recipe in res.data], [self.both.id])
+
+    def test_filter_by_invalid_tags(self):
+        """Test non numeric tag ids return an error."""
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeSparseFieldsAPITests(TestCase):
+    """Test selecting recipe fields with the fields parameter."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+    def test_list_selected_fields(self):
+        """Test only the requested fields are returned."""
+        res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [{'id': self.recipe.id, 'title': self.recipe.title}],
+        )
+
+    def test_list_skips_unrequested_columns_and_tags(self):
+        """Test unrequested columns and tags are not loaded."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 2)
+        recipe_query = queries[-1]['sql']
+        self.assertIn('"title"', recipe_query)
+        self.assertNotIn('"description"', recipe_query)
+        self.assertNotIn('"link"', recipe_query)
+
+    def test_list_selected_tags(self):
+        """Test tags are still prefetched when requested."""
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL, {'fields': 'title,tags'})
+
+        self.assertEqual(res.data[0]['title'], self.recipe.title)
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'Vegan')
+        self.assertNotIn('id', res.data[0])
+
+    def test_detail_selected_fields(self):
+        """Test the detail view returns only the requested fields."""
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            {'fields': 'description'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'description': self.recipe.description})
+
+    def test_unknown_fields(self):
+        """Test unknown field names return an error."""
+        res = self.client.get(RECIPES_URL, {'fields': 'title,description'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_fields_ignored_for_updates(self):
+        """Test writes always return the full representation."""
+        res = self.client.patch(
+            detail_url(self.recipe.id) + '?fields=title',
+            {'title': 'New title'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New title')
+        self.assertIn('description', res.data)
@@ -0,0 +1,116 @@
+"""
+Tests for the recipe stats API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag
+)
+
+
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+def create_user(email='test@example.com', password='password123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, time_minutes, price):
+    """Create and return a sample recipe."""
+    return Recipe.objects.create(
+        user=user,
+        title='Sample recipe',
+        time_minutes=time_minutes,
+        price=Decimal(price),
+    )
+
+
+class PublicStatsAPITests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test auth is required to call API."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateStatsAPITests(TestCase):
+    """Test authenticated API requests."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_empty_stats(self):
+        """Test stats of a user without recipes."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 0)
+        self.assertIsNone(res.data['price_average'])
+        self.assertEqual(
+            [bucket['recipe_count'] for bucket in res.data['time_minutes']],
+            [0, 0, 0, 0, 0],
+        )
+        self.assertEqual(res.data['top_tags'], [])
+
+    def test_retrieve_stats(self):
+        """Test stats summarize the recipes and tags of the user."""
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        quick = Tag.objects.create(user=self.user, name='Quick')
+        Tag.objects.create(user=self.user, name='Unused')
+        create_recipe(self.user, 10, '2.00').tags.add(dinner, quick)
+        create_recipe(self.user, 45, '5.00').tags.add(dinner)
+        create_recipe(self.user, 200, '9.50')
+        create_recipe(create_user(email='other@example.com'), 10, '99.00')
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 3)
+        self.assertEqual(res.data['price_average'], '5.50')
+        self.assertEqual(res.data['price_min'], '2.00')
+        self.assertEqual(res.data['price_max'], '9.50')
+        self.assertEqual(res.data['time_minutes'][0], {
+            'min_minutes': 0,
+            'max_minutes': 14,
+            'recipe_count': 1,
+        })
+        self.assertEqual(res.data['time_minutes'][-1], {
+            'min_minutes': 120,
+            'max_minutes': None,
+            'recipe_count': 1,
+        })
+        self.assertEqual(
+            [(t['name'], t['recipe_count']) for t in res.data['top_tags']],
+            [('Dinner', 2), ('Quick', 1)],
+        )
+
+    @override_settings(RECIPE_CACHE_ALIAS='default')
+    def test_stats_cached_until_recipes_change(self):
+        """Test stats are served from the cache until a recipe changes."""
+        recipe = create_recipe(self.user, 10, '2.00')
+        self.client.get(STATS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(STATS_URL)
+        self.assertEqual(res.data['recipe_count'], 1)
+
+        recipe.delete()
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 0)
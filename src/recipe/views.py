@@ -1,35 +1,105 @@
 """
 Views for the recipe API.
 """
+from django.db.models import Prefetch
+from django.utils.translation import gettext as _
+
 from rest_framework import (
+    generics,
     viewsets,
     mixins,
+    status,
 )
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from core.authentication import CachedTokenAuthentication
 from core.models import (
     Recipe,
     Tag
 )
-from recipe import serializers
+from recipe import (
+    exports,
+    pagination,
+    payloads,
+    serializers,
+    stats,
+)
+from recipe.filters import filter_recipes, filter_tags
+from recipe.mixins import (
+    CachedListMixin,
+    CachedRetrieveMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
+    cached_response,
+)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin,
+                    CachedListMixin,
+                    CachedRetrieveMixin,
+                    ValuesListMixin,
+                    viewsets.ModelViewSet):
     """view for manage recipe APIs."""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = pagination.RecipeCursorPagination
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(
+            user=self.request.user
+        ).order_by('-id')
+
+        fields = self.get_requested_fields()
+        if fields is not None:
+            queryset = queryset.only(
+                'id', *(name for name in fields if name != 'tags')
+            )
+        if fields is None or 'tags' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.order_by('id'))
+            )
+
+        if self.action != 'list':
+            return queryset
+
+        return filter_recipes(queryset, self.request.query_params)
+
+    def get_requested_fields(self):
+        """Return the fields asked for with ``?fields=``, if any."""
+        value = self.request.query_params.get('fields')
+        if self.action not in ('list', 'retrieve') or not value:
+            return None
+
+        return self.get_serializer_class().parse_fields(value)
+
+    def get_list_columns(self):
+        """Return the recipe columns loaded for the list."""
+        return payloads.columns(self.get_requested_fields())
+
+    def get_list_payload(self, rows):
+        """Return the list data, identical to RecipeSerializer output."""
+        return payloads.recipe_list(rows, self.get_requested_fields())
+
+    def get_serializer(self, *args, **kwargs):
+        """Return a serializer limited to the requested fields."""
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
         if self.action == 'list':
             return serializers.RecipeSerializer
+        elif self.action == 'batch':
+            return serializers.RecipeBatchSerializer
 
         return self.serializer_class
 
@@ -37,17 +107,77 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Create a new recipe."""
         serializer.save(user=self.request.user)
 
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='batch',
+        pagination_class=None,
+    )
+    def batch(self, request):
+        """Create or update a list of recipes in one transaction."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        saved = serializer.save(user=self.request.user)
+
+        recipes = self.get_queryset().in_bulk([recipe.id for recipe in saved])
+        result = serializers.RecipeDetailSerializer(
+            [recipes[recipe.id] for recipe in saved],
+            many=True,
+        )
 
-class TagViewSet(mixins.DestroyModelMixin,
+        return Response(result.data, status=status.HTTP_201_CREATED)
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        url_path='export',
+        pagination_class=None,
+    )
+    def export(self, request):
+        """Stream every recipe of the user as NDJSON or CSV."""
+        export_format = request.query_params.get('type', 'ndjson')
+        if export_format not in exports.FORMATS:
+            raise ValidationError({
+                'type': [
+                    _('Must be one of: %s.') % ', '.join(exports.FORMATS)
+                ]
+            })
+
+        return exports.export_response(self.get_queryset(), export_format)
+
+
+class TagViewSet(CachedListMixin,
+                 mixins.DestroyModelMixin,
                  mixins.UpdateModelMixin,
                  mixins.ListModelMixin,
                  viewsets.GenericViewSet):
     """view for manage tags APIs"""
-    serializer_class = serializers.TagSerializer
+    serializer_class = serializers.TagDetailSerializer
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = pagination.TagCursorPagination
 
     def get_queryset(self):
         """Retrieve tags for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = filter_tags(queryset, self.request.query_params)
+
+        return queryset.order_by('-name')
+
+
+class RecipeStatsView(generics.GenericAPIView):
+    """View for the recipe stats of the authenticated user."""
+    serializer_class = serializers.RecipeStatsSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return cached_response(self.summarize, request)
+
+    def summarize(self, request):
+        """Return the stats from the summary table."""
+        serializer = self.get_serializer(stats.summarize(request.user.id))
+
+        return Response(serializer.data)